@@ -0,0 +1,83 @@
+"""Reproducible benchmark corpus.
+
+Texts are generated from fixed word lists with a seeded random generator, so
+every run on every machine sees exactly the same input.
+"""
+
+import random
+
+SEED = 20240901
+
+# common words, including some that hit exceptions, foreign spellings, and
+# proper nouns
+WORDS = [
+    "東京", "大阪", "カツカレー", "美味しい", "電車", "新橋", "学校", "図書館",
+    "研究", "日本語", "私", "猫", "本", "読む", "書いた", "食べました", "高さ",
+    "タワー", "ホッピー", "清涼飲料水", "国立", "今日", "明日", "天気", "雨",
+    "行き", "乗った", "買い物", "お茶漬け", "抹茶", "重量", "専用", "繊維",
+    "ポール", "パンダ", "ゲーム", "マーケット", "条例", "発売", "記念", "公開",
+    "期間", "限定", "無料", "配信", "東京都", "渋谷", "駅前", "商品", "価格",
+]
+PARTICLES = ["は", "が", "を", "に", "で", "と", "の", "へ", "も", "から"]
+ENDINGS = ["です", "でした", "ます", "ました", "だ", "だった", "ない"]
+KANA = [
+    "ケメコデラックス", "プププランド", "シンシアリー", "ユアーズ", "アマガミ",
+    "すし", "てんぷら", "ラーメン", "キャッチ", "ちゃっかり", "ずっと",
+    "ウェブサイト", "ヴァイオリン", "ファイル", "ショッピング",
+]
+ASCII = ["NINJAL", "PV", "333m", "iPhone", "USB-C", "2024", "Wi-Fi", "ver.2"]
+PUNCT = ["、", "。", "「", "」", "（", "）", "！", "？", "・", "【", "】", "『", "』"]
+
+
+def sentence(rng, words):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(PARTICLES))
+    parts.append(rng.choice(WORDS))
+    parts.append(rng.choice(ENDINGS))
+    return "".join(parts)
+
+
+def short(rng):
+    return sentence(rng, rng.randint(0, 2))
+
+
+def long(rng):
+    return "。".join(sentence(rng, rng.randint(3, 8)) for _ in range(8)) + "。"
+
+
+def kana(rng):
+    return "".join(rng.choice(KANA) for _ in range(rng.randint(1, 3)))
+
+
+def ascii_mixed(rng):
+    parts = []
+    for _ in range(rng.randint(2, 5)):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice([" ", ""]) + rng.choice(ASCII) + " ")
+    return "".join(parts).strip()
+
+
+def punct(rng):
+    parts = []
+    for _ in range(rng.randint(3, 8)):
+        parts.append(rng.choice(PUNCT))
+        parts.append(rng.choice(WORDS + KANA))
+    return "".join(parts)
+
+
+KINDS = {
+    "short": short,
+    "long": long,
+    "kana": kana,
+    "ascii_mixed": ascii_mixed,
+    "punct": punct,
+}
+
+
+def build(kind, count, seed=SEED):
+    """Return a list of `count` texts of the given kind."""
+    rng = random.Random(f"{seed}-{kind}")
+    make = KINDS[kind]
+    return [make(rng) for _ in range(count)]
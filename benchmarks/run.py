@@ -0,0 +1,276 @@
+"""Benchmarks for cutlet's hot paths.
+
+Run from the repository root:
+
+    python benchmarks/run.py            # print results
+    python benchmarks/run.py --save     # record results as the baseline
+    python benchmarks/run.py --check    # exit with an error on regressions
+
+Each benchmark converts a generated corpus (see `corpus.py`) and reports
+characters per second, using the best of several repeats, and the peak memory
+allocated during a single pass, as measured by `tracemalloc`.
+
+Baselines depend on the machine, so record one before making changes and
+compare against it on the same machine.
+"""
+
+import argparse
+import atexit
+import functools
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = pathlib.Path(__file__).parent.absolute()
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+import corpus
+import jaconv
+from cutlet import Cutlet, normalize_text
+
+BASELINE = HERE / "baseline.json"
+clock = time.perf_counter
+
+
+def bench_normalize(cut, texts):
+    start = clock()
+    for text in texts:
+        normalize_text(text)
+    return clock() - start
+
+
+def bench_romaji(cut, texts):
+    start = clock()
+    for text in texts:
+        cut.romaji(text)
+    return clock() - start
+
+
+def bench_romaji_many(cut, texts):
+    start = clock()
+    for _ in cut.romaji_many(texts):
+        pass
+    return clock() - start
+
+
+def bench_slug(cut, texts):
+    start = clock()
+    for text in texts:
+        cut.slug(text)
+    return clock() - start
+
+
+def bench_romaji_dedup(cut, texts):
+    # short texts repeat a lot, like names and categories
+    start = clock()
+    cut.romaji_dedup(texts)
+    return clock() - start
+
+
+VARIANTS = {
+    "hepburn": {},
+    "kunrei": {"system": "kunrei"},
+    "nihon": {"system": "nihon"},
+}
+
+
+def bench_romaji_variants(cut, texts):
+    # three systems from one parse; compare with romaji/short divided by three
+    for _ in cut.romaji_variants_many(texts[:1], VARIANTS):
+        pass
+    start = clock()
+    for _ in cut.romaji_variants_many(texts, VARIANTS):
+        pass
+    return clock() - start
+
+
+def bench_romaji_tokens(cut, texts):
+    # Nodes are only valid until the next parse, so tagging can't be done up
+    # front; only the romaji_tokens calls are timed.
+    texts = [normalize_text(text) for text in texts]
+    elapsed = 0.0
+    for text in texts:
+        words = cut.tagger(text)
+        start = clock()
+        cut.romaji_tokens(words)
+        elapsed += clock() - start
+    return elapsed
+
+
+@functools.lru_cache(maxsize=None)
+def uncached_cutlet(lexicon):
+    """Return a Cutlet without a word cache, and with a lexicon if requested.
+
+    The lexicon is built in a temporary directory the first time, which takes
+    several seconds, and removed on exit.
+    """
+    path = None
+    if lexicon:
+        from cutlet.lexicon import build_lexicon
+
+        tmp = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, tmp, True)
+        path = os.path.join(tmp, "hepburn.lex")
+        build_lexicon(Cutlet(), path)
+    return Cutlet(word_cache_size=0, lexicon_path=path)
+
+
+@functools.lru_cache(maxsize=None)
+def result_cache_cutlet():
+    """Return a Cutlet with a result cache in a temporary directory."""
+    tmp = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, tmp, True)
+    return Cutlet(cache_path=os.path.join(tmp, "cache.db"))
+
+
+def bench_romaji_cache_hits(cut, texts):
+    # single calls that all hit the result cache; compare with romaji/short
+    cut = result_cache_cutlet()
+    for _ in cut.romaji_many(texts):
+        pass
+    return bench_romaji(cut, texts)
+
+
+def bench_romaji_uncached(cut, texts):
+    # every word is converted from its reading; compare with romaji_lexicon
+    return bench_romaji(uncached_cutlet(False), texts)
+
+
+def bench_romaji_lexicon(cut, texts):
+    # the same, but readings of known words are looked up in a lexicon
+    return bench_romaji(uncached_cutlet(True), texts)
+
+
+def bench_map_kana(cut, texts):
+    texts = [jaconv.kata2hira(text) for text in texts]
+    start = clock()
+    for text in texts:
+        cut.map_kana(text)
+    return clock() - start
+
+
+def bench_cli(cut, texts):
+    # includes interpreter and dictionary startup
+    data = "\n".join(texts).encode("utf-8")
+    cmd = [sys.executable, "-c", "from cutlet.cli import main; main()"]
+    start = clock()
+    subprocess.run(
+        cmd, input=data, stdout=subprocess.DEVNULL, check=True, cwd=HERE.parent
+    )
+    return clock() - start
+
+
+# name: (function, corpus kind, number of texts)
+BENCHMARKS = {
+    "normalize_text/short": (bench_normalize, "short", 2000),
+    "normalize_text/ascii_mixed": (bench_normalize, "ascii_mixed", 2000),
+    "romaji/short": (bench_romaji, "short", 2000),
+    "romaji/long": (bench_romaji, "long", 100),
+    "romaji/kana": (bench_romaji, "kana", 2000),
+    "romaji/ascii_mixed": (bench_romaji, "ascii_mixed", 2000),
+    "romaji/punct": (bench_romaji, "punct", 2000),
+    "romaji_many/short": (bench_romaji_many, "short", 2000),
+    "romaji_dedup/short": (bench_romaji_dedup, "short", 2000),
+    "romaji_variants/short": (bench_romaji_variants, "short", 2000),
+    "romaji_tokens/short": (bench_romaji_tokens, "short", 2000),
+    "romaji_tokens/long": (bench_romaji_tokens, "long", 100),
+    "romaji_tokens/punct": (bench_romaji_tokens, "punct", 2000),
+    "romaji_cache_hits/short": (bench_romaji_cache_hits, "short", 2000),
+    "romaji_uncached/short": (bench_romaji_uncached, "short", 2000),
+    "romaji_lexicon/short": (bench_romaji_lexicon, "short", 2000),
+    "map_kana/kana": (bench_map_kana, "kana", 2000),
+    "slug/short": (bench_slug, "short", 2000),
+    "cli/short": (bench_cli, "short", 5000),
+}
+
+
+def measure(name, repeats, scale):
+    func, kind, count = BENCHMARKS[name]
+    texts = corpus.build(kind, max(int(count * scale), 1))
+    chars = sum(len(text) for text in texts)
+    cut = Cutlet()
+
+    best = min(func(cut, texts) for _ in range(repeats))
+
+    tracemalloc.start()
+    func(cut, texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"chars_per_sec": chars / best, "peak_bytes": peak}
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression descriptions."""
+    problems = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result["chars_per_sec"] < base["chars_per_sec"] * (1 - tolerance):
+            problems.append(
+                f"{name}: {result['chars_per_sec']:.0f} chars/sec, "
+                f"baseline {base['chars_per_sec']:.0f}"
+            )
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+            problems.append(
+                f"{name}: peak {result['peak_bytes']} bytes, "
+                f"baseline {base['peak_bytes']}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--only", help="run benchmarks whose name contains this")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply corpus sizes by this"
+    )
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save", action="store_true", help="save as the baseline")
+    parser.add_argument(
+        "--check", action="store_true", help="fail if slower than the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed fraction of slowdown or memory growth for --check",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name in BENCHMARKS:
+        if args.only and args.only not in name:
+            continue
+        result = results[name] = measure(name, args.repeats, args.scale)
+        print(
+            f"{name:30} {result['chars_per_sec']:>12,.0f} chars/sec"
+            f" {result['peak_bytes'] / 1024:>10,.1f} KiB peak"
+        )
+
+    if args.save:
+        with open(args.baseline, "w") as outfile:
+            json.dump(results, outfile, indent=2, sort_keys=True)
+            outfile.write("\n")
+
+    if args.check:
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+        problems = compare(results, baseline, args.tolerance)
+        for problem in problems:
+            print("REGRESSION", problem)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Startup benchmark for cutlet.
+
+Run from the repository root:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeats 10
+
+Each repeat runs in a fresh interpreter and reports the time to import cutlet,
+to create a `Cutlet`, and to convert the first string, as well as the time
+for `warmup` when it's called before the first conversion. The median of the
+repeats is printed, in milliseconds.
+
+Run with bytecode caching enabled (the default), or the time to compile
+cutlet's source will be counted as import time.
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+HERE = pathlib.Path(__file__).parent.absolute()
+
+SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+clock = time.perf_counter
+times = {{}}
+start = clock()
+import cutlet
+times["import"] = clock() - start
+start = clock()
+katsu = cutlet.Cutlet()
+times["init"] = clock() - start
+if {warmup!r}:
+    start = clock()
+    katsu.warmup()
+    times["warmup"] = clock() - start
+start = clock()
+katsu.romaji("カツカレーは美味しい")
+times["first"] = clock() - start
+times["loaded"] = sorted(
+    name for name in ("fugashi", "asyncio", "sqlite3", "multiprocessing")
+    if name in sys.modules
+)
+print(json.dumps(times))
+"""
+
+
+def run_once(warmup):
+    script = SCRIPT.format(root=str(HERE.parent), warmup=warmup)
+    out = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for warmup in (False, True):
+        runs = [run_once(warmup) for _ in range(args.repeats)]
+        label = "with warmup" if warmup else "without warmup"
+        print(label)
+        for key in ("import", "init", "warmup", "first"):
+            if key in runs[0]:
+                ms = statistics.median(run[key] for run in runs) * 1000
+                print(f"  {key:<8} {ms:8.1f} ms")
+        print("  loaded  ", ", ".join(runs[-1]["loaded"]) or "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""asyncio support, with coalescing of concurrent requests into batches.
+
+This is used by `Cutlet.aromaji`; see `Cutlet.configure_async` for options.
+"""
+
+import asyncio
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+
+from .parallel import load_worker_cutlet
+
+# (key, Cutlet) for the current worker process, when using processes
+_process_cutlet = (None, None)
+
+
+def convert_batch(cutlet, items):
+    """Convert a list of (text, capitalize, title) items."""
+    out = []
+    for (capitalize, title), group in groupby(items, key=itemgetter(1, 2)):
+        texts = [item[0] for item in group]
+        out.extend(cutlet.romaji_many(texts, capitalize, title))
+    return out
+
+
+def _convert_in_process(key, state, items):
+    global _process_cutlet
+    if _process_cutlet[0] != key:
+        _process_cutlet = (key, load_worker_cutlet(state))
+    return convert_batch(_process_cutlet[1], items)
+
+
+class Coalescer:
+    def __init__(self, cutlet, executor=None, max_batch_size=256, max_delay=0.002):
+        """Collect requests from the running event loop into batches.
+
+        A batch is sent to `executor` when it has `max_batch_size` requests,
+        or `max_delay` seconds after its first request arrived, whichever
+        comes first. If `executor` is None the loop's default executor is
+        used.
+
+        With a thread executor, only one batch runs at a time unless `cutlet`
+        is thread safe; requests arriving meanwhile form the next batch. With
+        a `ProcessPoolExecutor`, each worker process keeps its own copy of
+        `cutlet`, and batches run in parallel.
+        """
+        self.cutlet = cutlet
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.loop = asyncio.get_running_loop()
+
+        self.processes = isinstance(executor, ProcessPoolExecutor)
+        # None means no limit
+        self.max_running = None if self.processes or cutlet.thread_safe else 1
+        self._running = 0
+        self._pending = []
+        self._timer = None
+        self._state = (None, None)
+
+    def submit(self, text, capitalize=True, title=False):
+        """Queue a text for conversion, returning a future for the result."""
+        future = self.loop.create_future()
+        self._pending.append(((text, capitalize, title), future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.max_delay, self._dispatch)
+        return future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and (
+            self.max_running is None or self._running < self.max_running
+        ):
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            self._start(batch)
+
+    def _process_state(self):
+        """Return a key and pickled state identifying the Cutlet's settings."""
+        key = (self.cutlet.fingerprint(), self.cutlet.fast_path)
+        if self._state[0] != key:
+            self._state = (key, pickle.dumps(self.cutlet))
+        return self._state
+
+    def _start(self, batch):
+        items = [item for item, _ in batch]
+        if self.processes:
+            call = partial(_convert_in_process, *self._process_state(), items)
+        else:
+            call = partial(convert_batch, self.cutlet, items)
+        self._running += 1
+        task = self.loop.run_in_executor(self.executor, call)
+        task.add_done_callback(partial(self._finish, batch))
+
+    def _finish(self, batch, task):
+        self._running -= 1
+        if task.cancelled():
+            for _, future in batch:
+                future.cancel()
+        elif task.exception() is not None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(task.exception())
+        else:
+            for (_, future), result in zip(batch, task.result()):
+                if not future.done():
+                    future.set_result(result)
+        # requests that arrived while this batch was running have waited
+        # long enough already
+        if self._pending:
+            self._dispatch()
@@ -0,0 +1,160 @@
+"""Persistent storage of conversion results.
+
+This is used by `Cutlet` when given a `cache_path`; see there for details.
+"""
+
+import sqlite3
+import threading
+import weakref
+
+# SQLite limits the number of parameters in a single query
+QUERY_SIZE = 500
+# hits whose recency is kept in memory before being written anyway
+MAX_TOUCHED = 10_000
+
+
+def _flush(conn, touched):
+    """Write the recency of recent hits, clearing `touched`.
+
+    Commits are left to the caller.
+    """
+    if touched:
+        conn.executemany(
+            "UPDATE results SET used = ? WHERE key = ?",
+            [(clock, key) for key, clock in touched.items()],
+        )
+        touched.clear()
+
+
+def _close(conn, touched):
+    _flush(conn, touched)
+    conn.commit()
+    conn.close()
+
+
+class ResultCache:
+    def __init__(self, path, max_size=1_000_000):
+        """Open or create a cache file at `path`.
+
+        At most `max_size` results are kept. When the cache grows past that,
+        the least recently used tenth is removed.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        # The connection may be used from several threads by a thread-safe
+        # Cutlet, so access is serialized with a lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Each batch of new results is committed right away, so other
+        # processes or Cutlets can use the file too. In WAL mode these commits
+        # are cheap. Lookups don't write at all; which keys were used when is
+        # kept in memory, and written with the next results or on close.
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS results (
+                key BLOB PRIMARY KEY,
+                value TEXT NOT NULL,
+                used INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS results_used ON results (used);
+            """
+        )
+        count, clock = self._conn.execute(
+            "SELECT COUNT(*), MAX(used) FROM results"
+        ).fetchone()
+        self._count = count
+        # incremented for each batch, to track recency
+        self._clock = (clock or 0) + 1
+        # key: clock for hits not written yet
+        self._touched = {}
+        self._finalizer = weakref.finalize(self, _close, self._conn, self._touched)
+
+    def get_many(self, keys):
+        """Look up keys, returning a dict of the ones that were found."""
+        with self._lock:
+            found = {}
+            keys = list(set(keys))
+            for start in range(0, len(keys), QUERY_SIZE):
+                chunk = keys[start : start + QUERY_SIZE]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM results WHERE key IN ({marks})", chunk
+                )
+                found.update(rows)
+            self._touch(found)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self._clock += 1
+            return found
+
+    def put_many(self, items):
+        """Store (key, value) pairs."""
+        with self._lock:
+            rows = [(key, value, self._clock) for key, value in items]
+            if not rows:
+                return
+            # written first, so eviction sees them
+            _flush(self._conn, self._touched)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, value, used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._count += len(rows)
+            if self._count > self.max_size:
+                self._evict()
+            self._conn.commit()
+
+    def get(self, key):
+        """Look up a single key, returning None if it's missing."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touch([key])
+            self.hits += 1
+            self._clock += 1
+            return row[0]
+
+    def _touch(self, keys):
+        """Note that keys were just used, writing them out if there are many."""
+        touched = self._touched
+        clock = self._clock
+        for key in keys:
+            touched[key] = clock
+        if len(touched) > MAX_TOUCHED:
+            _flush(self._conn, touched)
+            self._conn.commit()
+
+    def put(self, key, value):
+        """Store a single value."""
+        self.put_many([(key, value)])
+
+    def _evict(self):
+        # The count may be an overestimate due to replaced rows, so check it.
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = self._count - self.max_size
+        if excess <= 0:
+            return
+        excess += self.max_size // 10
+        self._conn.execute(
+            "DELETE FROM results WHERE key IN "
+            "(SELECT key FROM results ORDER BY used LIMIT ?)",
+            (excess,),
+        )
+        self._count = max(self._count - excess, 0)
+
+    def close(self):
+        """Close the file."""
+        self._finalizer()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -1,5 +1,11 @@
 from cutlet import Cutlet
-import fileinput
+from cutlet.parallel import WorkerPool, chunked
+from collections import deque
+from itertools import islice
+import argparse
+import csv
+import gzip
+import json
 import sys
 
 if sys.platform != "win32":
@@ -8,14 +14,415 @@ if sys.platform != "win32":
 
     signal(SIGPIPE, SIG_DFL)
 
+SYSTEMS = ("hepburn", "kunrei", "nihon", "nippon")
+FORMATS = ("text", "jsonl", "tsv", "csv")
+
+# size of the stdout buffer, so output is written in large blocks
+OUTPUT_BUFFER = 1 << 20
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cutlet",
+        description="Convert Japanese text to romaji, one line at a time.",
+    )
+    # The default is applied later, so a server's system is used if a
+    # system isn't given explicitly.
+    parser.add_argument(
+        "system", nargs="?", choices=SYSTEMS, help="romaji system (default hepburn)"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        action="append",
+        metavar="FILE",
+        help="read from FILE instead of stdin; may be repeated. "
+        "Files ending in .gz are decompressed. Use - for stdin.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--slug", action="store_true", help="output URL slugs")
+    mode.add_argument("--title", action="store_true", help="use title case")
+    parser.add_argument(
+        "--no-capitalize",
+        action="store_true",
+        help="don't capitalize the first letter of each line",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes; output order is preserved",
+    )
+    parser.add_argument(
+        "--format",
+        default="text",
+        choices=FORMATS,
+        help="input format; for anything but text, only the selected "
+        "fields or columns are converted and everything else is passed through",
+    )
+    parser.add_argument(
+        "--field",
+        action="append",
+        default=[],
+        help="JSONL field to convert; may be repeated",
+    )
+    parser.add_argument(
+        "--out-field",
+        action="append",
+        default=[],
+        help="field or header name for each converted value; "
+        "the default is the input name plus _romaji",
+    )
+    parser.add_argument(
+        "--column",
+        action="append",
+        default=[],
+        type=int,
+        help="TSV or CSV column to convert, starting from 1; may be repeated. "
+        "Results are appended as new columns.",
+    )
+    parser.add_argument(
+        "--header",
+        action="store_true",
+        help="the first TSV or CSV row is a header",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1024,
+        help="lines to read and write at a time",
+    )
+    parser.add_argument(
+        "-e",
+        "--exceptions",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="extra exceptions, as TSV or a file from `cutlet compile-exceptions`; "
+        "may be repeated",
+    )
+    parser.add_argument(
+        "--lexicon",
+        metavar="FILE",
+        help="precomputed romaji from `cutlet build-lexicon` for the same system",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="ADDRESS",
+        help="send text to a server started with `cutlet serve` at ADDRESS, "
+        "a socket path or host:port, instead of loading the dictionary",
+    )
+    return parser
+
+
+def build_serve_parser():
+    parser = argparse.ArgumentParser(
+        prog="cutlet serve",
+        description="Keep a converter loaded and answer requests from "
+        "`cutlet --connect` or other clients.",
+    )
+    parser.add_argument(
+        "system", nargs="?", default="hepburn", choices=SYSTEMS, help="romaji system"
+    )
+    parser.add_argument(
+        "address",
+        help="Unix socket path, or host:port to listen on TCP; "
+        "use a local host, as there is no authentication",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "-e",
+        "--exceptions",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="extra exceptions, as TSV or a compiled file; may be repeated",
+    )
+    parser.add_argument(
+        "--lexicon",
+        metavar="FILE",
+        help="precomputed romaji from `cutlet build-lexicon` for the same system",
+    )
+    return parser
+
+
+def build_compile_parser():
+    parser = argparse.ArgumentParser(
+        prog="cutlet compile-exceptions",
+        description="Compile TSV exception lists into a file that loads "
+        "instantly and is shared between processes. Use it with --exceptions.",
+    )
+    parser.add_argument("output", help="path of the compiled file")
+    parser.add_argument(
+        "input", nargs="+", help="TSV files; later files override earlier ones"
+    )
+    return parser
+
+
+def build_lexicon_parser():
+    parser = argparse.ArgumentParser(
+        prog="cutlet build-lexicon",
+        description="Precompute romaji for every reading in the dictionary. "
+        "Use it with --lexicon; it only applies to the system it was built for.",
+    )
+    parser.add_argument(
+        "system", nargs="?", default="hepburn", choices=SYSTEMS, help="romaji system"
+    )
+    parser.add_argument("output", help="path of the lexicon file")
+    return parser
+
+
+def open_input(path, newline=None):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline=newline)
+    return open(path, encoding="utf-8", newline=newline)
+
+
+def read_records(paths, fmt):
+    """Yield records from each file in turn.
+
+    For text a record is a stripped line, for JSONL it's a dict, and for TSV
+    and CSV it's a list of columns.
+    """
+    for path in paths:
+        infile = open_input(path, "" if fmt == "csv" else None)
+        try:
+            if fmt == "csv":
+                yield from csv.reader(infile)
+            elif fmt == "tsv":
+                for line in infile:
+                    yield line.rstrip("\r\n").split("\t")
+            elif fmt == "jsonl":
+                for line in infile:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                for line in infile:
+                    yield line.strip()
+        finally:
+            if infile is not sys.stdin:
+                infile.close()
+
+
+def get_value(record, key):
+    """Get a value to convert from a record; missing values are empty."""
+    if key is None:
+        return record
+    if isinstance(record, dict):
+        value = record.get(key)
+        return "" if value is None else str(value)
+    return record[key] if key < len(record) else ""
+
+
+def convert_records(katsu, records, keys, out_keys, args):
+    """Yield records with the values at `keys` converted.
+
+    Values from all records are sent through a single stream, so parallel
+    workers stay busy, and only records whose results are still pending are
+    held in memory.
+    """
+    pending = deque()
+
+    def values():
+        for record in records:
+            pending.append(record)
+            for key in keys:
+                yield get_value(record, key)
+
+    results = convert(katsu, values(), args)
+    while True:
+        converted = list(islice(results, len(keys)))
+        if not converted:
+            return
+        record = pending.popleft()
+        if out_keys is None:
+            # plain text, the line is replaced
+            yield converted[0]
+        elif isinstance(record, dict):
+            record.update(zip(out_keys, converted))
+            yield record
+        else:
+            # pad short rows so results always land in the same columns
+            missing = max(keys) + 1 - len(record)
+            yield record + [""] * missing + converted
+
+
+def write_records(out, fmt, batch):
+    if fmt == "csv":
+        csv.writer(out, lineterminator="\n").writerows(batch)
+        return
+    if fmt == "jsonl":
+        batch = [json.dumps(record, ensure_ascii=False) for record in batch]
+    elif fmt == "tsv":
+        batch = ["\t".join(record) for record in batch]
+    batch.append("")
+    out.write("\n".join(batch))
+
+
+def convert(katsu, lines, args):
+    """Yield converted lines according to the command-line options.
+
+    If connecting to a server, `katsu` is a `Client`.
+    """
+    from cutlet.server import batch_method
+
+    mode = "slug" if args.slug else "romaji"
+    capitalize = not args.no_capitalize
+    if args.connect:
+        for batch in chunked(lines, args.batch_size):
+            yield from katsu.request(batch, mode, capitalize, args.title, args.system)
+        return
+
+    method, kwargs = batch_method(mode, capitalize, args.title)
+    if args.jobs > 1:
+        with WorkerPool(katsu, args.jobs) as pool:
+            yield from pool.imap(method, lines, args.batch_size, **kwargs)
+    else:
+        yield from getattr(katsu, method)(lines, **kwargs)
+
+
+def serve(argv):
+    from cutlet.server import Engine, make_server, remove_socket
+
+    args = build_serve_parser().parse_args(argv)
+    # requests are handled in threads
+    katsu = Cutlet(
+        args.system,
+        thread_safe=True,
+        exception_files=args.exceptions,
+        lexicon_path=args.lexicon,
+    )
+    engine = Engine(katsu, args.jobs)
+    try:
+        server = make_server(engine, args.address)
+    except FileExistsError as err:
+        engine.close()
+        sys.exit(f"cutlet serve: {err}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        remove_socket(server)
+        engine.close()
+
+
+def compile_exceptions(argv):
+    from cutlet.cutlet import load_exceptions
+    from cutlet.index import build_index
+
+    args = build_compile_parser().parse_args(argv)
+    exceptions = {}
+    for path in args.input:
+        exceptions.update(load_exceptions(path))
+    count = build_index(exceptions.items(), args.output)
+    print(f"wrote {count} exceptions to {args.output}", file=sys.stderr)
+
+
+def build_lexicon(argv):
+    from cutlet.lexicon import build_lexicon
+
+    args = build_lexicon_parser().parse_args(argv)
+    count = build_lexicon(Cutlet(args.system), args.output)
+    print(f"wrote {count} readings to {args.output}", file=sys.stderr)
+
+
+COMMANDS = {
+    "serve": serve,
+    "compile-exceptions": compile_exceptions,
+    "build-lexicon": build_lexicon,
+}
+
 
 def main():
-    system = sys.argv[1] if len(sys.argv) > 1 else "hepburn"
+    command = COMMANDS.get(sys.argv[1] if len(sys.argv) > 1 else None)
+    if command is not None:
+        return command(sys.argv[2:])
+
+    parser = build_parser()
+    args = parser.parse_args()
+
+    # keys are the fields or column indices to convert
+    header = None
+    if args.format == "text":
+        keys, out_keys = [None], None
+    elif args.format == "jsonl":
+        if not args.field:
+            parser.error("--format jsonl requires --field")
+        keys = args.field
+        out_keys = args.out_field or [key + "_romaji" for key in keys]
+    else:
+        if not args.column:
+            parser.error(f"--format {args.format} requires --column")
+        if min(args.column) < 1:
+            parser.error("--column numbers start from 1")
+        keys = [col - 1 for col in args.column]
+        out_keys = keys
+    if out_keys is not None and args.out_field and len(args.out_field) != len(keys):
+        parser.error("each --field or --column needs an --out-field")
+
+    if args.connect:
+        from cutlet.server import Client
 
-    katsu = Cutlet(system)
+        # these are settings of the server's converter
+        server_only = [
+            name
+            for name, value in (
+                ("--jobs", args.jobs > 1),
+                ("--exceptions", args.exceptions),
+                ("--lexicon", args.lexicon),
+            )
+            if value
+        ]
+        if server_only:
+            parser.error(
+                f"{', '.join(server_only)} can't be used with --connect; "
+                "give them to `cutlet serve` instead"
+            )
+        katsu = Client(args.connect)
+    else:
+        katsu = Cutlet(
+            args.system or "hepburn",
+            exception_files=args.exceptions,
+            lexicon_path=args.lexicon,
+        )
+    paths = args.input or ["-"]
+    # when typing at a terminal, answer each line right away
+    interactive = "-" in paths and sys.stdin.isatty()
+    if interactive:
+        args.batch_size = 1
+    records = read_records(paths, args.format)
+    if args.header and args.format in ("tsv", "csv"):
+        header = next(records, None)
+    out = open(
+        sys.stdout.fileno(),
+        "w",
+        buffering=OUTPUT_BUFFER,
+        encoding=sys.stdout.encoding,
+        closefd=False,
+    )
 
     try:
-        for line in fileinput.input([]):
-            print(katsu.romaji(line.strip()))
+        with out:
+            if header is not None:
+                names = args.out_field or [
+                    get_value(header, key) + "_romaji" for key in keys
+                ]
+                write_records(out, args.format, [header + names])
+            records = convert_records(katsu, records, keys, out_keys, args)
+            for batch in chunked(records, args.batch_size):
+                write_records(out, args.format, batch)
+                if interactive:
+                    out.flush()
     except KeyboardInterrupt:
         sys.exit(0)
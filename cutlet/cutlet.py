@@ -1,18 +1,45 @@
-import fugashi
-import jaconv
-import mojimoji
+import hashlib
 import unicodedata
 import re
 import pathlib
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
 
 from .mapping import *
+from .stats import StageStats
+
+# Heavier modules (fugashi, jaconv, and the parts of cutlet that use asyncio,
+# multiprocessing and sqlite3) are imported where they're used, so that
+# importing cutlet is fast. Use `Cutlet.warmup` to load everything up front.
 
 SUTEGANA = "ゃゅょぁぃぅぇぉ"
 PUNCT = "'\".!?(),;:-"
 ODORI = "々〃ゝゞヽゞ"
 
+# romaji_stream splits documents after these
+SENTENCE_END = re.compile("(?<=[。！？!?\n])")
+
+# Full-width quotes that mojimoji.zen_to_han converted to ASCII, and NFKC
+# leaves alone. Note that left double quotes were never converted.
+WIDTH_QUOTES = str.maketrans({"\u2018": "`", "\u2019": "'", "\u201d": '"'})
+
+# for slugify
+NOT_SLUG = re.compile(r"[^a-z0-9]+")
+SLUG_TABLE = str.maketrans(
+    {
+        chr(cc): (chr(cc).lower() if chr(cc).isalnum() else " ")
+        for cc in range(128)
+    }
+)
+
+# inputs that can skip the tagger when fast_path is enabled
+KANA_ONLY = re.compile("[ぁ-ゖァ-ヺー]+")
+
+# key for values in a phrase exception trie; tokens are always strings
+PHRASE_END = None
+
 # MeCab character types; see char.def
 CHAR_ALPHA = 5
 CHAR_HIRAGANA = 6
@@ -54,6 +81,21 @@ def has_foreign_lemma(word):
         return True
 
 
+def neighbors(items):
+    """Yield each item of an iterable with the items before and after it.
+
+    The first item has no previous item and the last has no next item, in which
+    case None is used.
+    """
+    items = iter(items)
+    prev = None
+    cur = next(items, None)
+    while cur is not None:
+        nxt = next(items, None)
+        yield prev, cur, nxt
+        prev, cur = cur, nxt
+
+
 def normalize_text(text):
     """Given text, normalize variations in Japanese.
 
@@ -63,42 +105,231 @@ def normalize_text(text):
     - Unicode NFKC normalization
     - Full-width Latin to half-width
     - Half-width katakana to full-width
+
+    These used to be separate passes, with the last two done by mojimoji.
+    NFKC already does almost all of the width conversion, so the only thing
+    left is a few quotes that mojimoji converts and NFKC doesn't; see
+    `WIDTH_QUOTES`. The output is the same as before, which is checked by
+    the tests.
     """
-    # perform unicode normalization
+    if text.isascii():
+        # nothing to do, and this is cheap to check
+        return text
+    # this returns the text as is if it's already normalized
     text = unicodedata.normalize("NFKC", text)
-    # convert all full-width alphanum to half-width, since it can go out as-is
-    text = mojimoji.zen_to_han(text, kana=False)
-    # replace half-width katakana with full-width
-    text = mojimoji.han_to_zen(text, digit=False, ascii=False)
+    if "\u2018" in text or "\u2019" in text or "\u201d" in text:
+        text = text.translate(WIDTH_QUOTES)
     return text
 
 
-def load_exceptions():
-    """Load list of exceptions from included data file."""
-    cdir = pathlib.Path(__file__).parent.absolute()
+def load_exceptions(path=None):
+    """Load list of exceptions from a TSV file.
+
+    By default the included data file is used. Each line has a token surface
+    and its romaji, separated by a tab. Blank lines and lines starting with
+    `#` are ignored.
+    """
+    if path is None:
+        path = pathlib.Path(__file__).parent.absolute() / "exceptions.tsv"
     exceptions = {}
-    with open(cdir / "exceptions.tsv", encoding="utf-8") as exceptions_file:
-        for line in exceptions_file:
+    with open(path, encoding="utf-8") as exceptions_file:
+        for lineno, line in enumerate(exceptions_file, 1):
             line = line.strip()
             # allow comments and blanks
-            if line[0] == "#" or not line:
+            if not line or line[0] == "#":
                 continue
-            key, val = line.split("\t")
+            try:
+                key, val = line.split("\t")
+            except ValueError:
+                raise ValueError(f"{path}:{lineno}: expected two tab-separated fields")
             exceptions[key] = val
     return exceptions
 
 
-@dataclass
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class DedupResult(namedtuple("DedupResult", ["results", "total", "unique"])):
+    """Output of `Cutlet.romaji_dedup`.
+
+    `results` is the list of outputs, `total` the number of inputs, and
+    `unique` the number of distinct inputs after normalization, which is
+    how many were actually converted.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ratio(self):
+        """The number of inputs per distinct input; 1 means no duplicates."""
+        return self.total / self.unique if self.unique else 1.0
+
+
 class Token:
-    surface: str
-    space: bool  # if a space should follow
-    # whether this comes from a foreign lemma
-    foreign: bool = False
+    """The romaji output for a single node.
+
+    `start` and `end` are the offsets of the node's surface in the text that
+    was tokenized, if known.
+    """
+
+    # Documents can produce millions of these, so they don't have a __dict__.
+    __slots__ = ("surface", "space", "foreign", "start", "end")
+
+    def __init__(self, surface, space, foreign=False, start=None, end=None):
+        self.surface = surface
+        self.space = space  # if a space should follow
+        # whether this comes from a foreign lemma
+        self.foreign = foreign
+        self.start = start
+        self.end = end
 
     def __str__(self):
         sp = " " if self.space else ""
         return f"{self.surface}{sp}"
 
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Token({fields})"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class NodeInfo:
+    """A copy of the parts of a node that conversion uses.
+
+    Nodes from the tagger are only valid until the next time it's called, so
+    this is used when nodes from several calls need to be processed together.
+    """
+
+    __slots__ = ("surface", "white_space", "char_type", "is_unk", "feature")
+
+    def __init__(self, node):
+        self.surface = node.surface
+        self.white_space = node.white_space
+        self.char_type = node.char_type
+        self.is_unk = node.is_unk
+        self.feature = node.feature
+
+
+class PhraseNode(NodeInfo):
+    """A node that is part of a phrase exception.
+
+    `phrase` is the romaji for the whole phrase on its first node, and empty
+    on the rest, and `first` marks the first node.
+    """
+
+    __slots__ = ("phrase", "first")
+
+    def __init__(self, node, phrase, first):
+        super().__init__(node)
+        self.phrase = phrase
+        self.first = first
+
+
+def slugify(roma):
+    """Make a slug from romaji, as described in `Cutlet.slug`."""
+    if roma.isascii():
+        # Map upper case to lower, and anything else that isn't a letter or
+        # digit to a space, so splitting drops each run of them.
+        return "-".join(roma.translate(SLUG_TABLE).split())
+    return NOT_SLUG.sub("-", roma.lower()).strip("-")
+
+
+def node_attrs(node):
+    """Read the attributes of a node that `Cutlet` uses into a tuple.
+
+    The tuple has the surface, whitespace, pos1, pos2, features, whether it's
+    unknown, character type, and the node itself.
+    """
+    feature = node.feature
+    return (
+        node.surface,
+        node.white_space,
+        feature.pos1,
+        feature.pos2,
+        feature,
+        node.is_unk,
+        node.char_type,
+        node,
+    )
+
+
+def build_trie(phrases):
+    """Build a trie from a dict of token sequences to values.
+
+    Each level is a dict keyed by token, and the value for a complete sequence
+    is stored under `PHRASE_END`.
+    """
+    trie = {}
+    for key, val in phrases.items():
+        node = trie
+        for part in key:
+            node = node.setdefault(part, {})
+        node[PHRASE_END] = val
+    return trie
+
+
+def _kata2hira(text):
+    """Convert katakana to hiragana.
+
+    This imports jaconv on first use and replaces itself with
+    `jaconv.kata2hira`, so later calls don't run an import statement.
+    """
+    global _kata2hira
+    import jaconv
+
+    _kata2hira = jaconv.kata2hira
+    return _kata2hira(text)
+
+
+def make_tagger(mecab_args=""):
+    """Create a MeCab tagger."""
+    import fugashi
+
+    return fugashi.Tagger(mecab_args)
+
+
+class TaggerPool:
+    """A tagger that can be used from several threads at once.
+
+    A MeCab tagger can only parse one text at a time, and its nodes are only
+    valid until the next parse. This keeps a pool of taggers, checking one out
+    for each call and returning copies of the nodes as `NodeInfo` objects. A
+    new tagger is created when all existing ones are busy, so the pool grows
+    to the number of concurrent callers.
+    """
+
+    def __init__(self, mecab_args=""):
+        self.mecab_args = mecab_args
+        # list.pop and list.append are atomic, so no lock is needed
+        self._idle = [make_tagger(mecab_args)]
+
+    def _acquire(self):
+        try:
+            return self._idle.pop()
+        except IndexError:
+            return make_tagger(self.mecab_args)
+
+    def parseToNodeList(self, text):
+        tagger = self._acquire()
+        try:
+            return [NodeInfo(node) for node in tagger(text)]
+        finally:
+            self._idle.append(tagger)
+
+    __call__ = parseToNodeList
+
+    @property
+    def dictionary_info(self):
+        tagger = self._acquire()
+        try:
+            return tagger.dictionary_info
+        finally:
+            self._idle.append(tagger)
+
 
 class Cutlet:
     def __init__(
@@ -107,6 +338,13 @@ class Cutlet:
         use_foreign_spelling=True,
         ensure_ascii=True,
         mecab_args="",
+        word_cache_size=8192,
+        fast_path=False,
+        cache_path=None,
+        cache_size=1_000_000,
+        thread_safe=False,
+        exception_files=(),
+        lexicon_path=None,
     ):
         """Create a Cutlet object, which holds configuration as well as
         tokenizer state.
@@ -122,6 +360,59 @@ class Cutlet:
         romanized will be replaced with `?`. If false, they will be passed
         through.
 
+        Romaji for each distinct word is cached, keeping up to
+        `word_cache_size` entries. The cache is cleared automatically when
+        settings change; set the size to 0 to disable it. See
+        `Cutlet.cache_info` for statistics.
+
+        If `fast_path` is true, some inputs skip the tokenizer entirely. Plain
+        ASCII made only of letters, digits and spaces is passed through with
+        runs of spaces collapsed, which is always the same as the normal
+        output; this is skipped when `title` is true. Input that is entirely
+        hiragana or katakana (after normalization) is converted directly as a
+        single word, unless that gives no output, as for a lone small kana.
+        This differs from normal output when the text is more than one word:
+        no spaces are inserted, particles are read as written (は is "ha"),
+        and exceptions, foreign spellings, proper noun and title
+        capitalization are not applied. This is useful for readings, like
+        furigana fields.
+
+        If `cache_path` is given, results of `Cutlet.romaji` and related methods
+        are stored in an SQLite database at that path, so converting the same
+        text again, even in a later run, is just a lookup. Keys include a
+        fingerprint of all settings, mappings, exceptions and the dictionary, so
+        changing any of them won't return stale results. At most `cache_size`
+        results are kept, dropping the least recently used. The cache is not
+        used by worker processes in `Cutlet.romaji_parallel`.
+
+        If `thread_safe` is true, one `Cutlet` can be shared by many threads,
+        as in a threaded web server. Each call checks out a tagger from a
+        `TaggerPool`, and `add_exception` and `update_mapping` replace the
+        exception and mapping tables with updated copies instead of modifying
+        them. Each call runs on a snapshot of the settings taken when it
+        starts, with its own word and kana caches, so calls in progress are
+        unaffected by changes, which apply from the next call. Statistics from
+        `Cutlet.cache_info` and `Cutlet.enable_stats` are approximate in this
+        mode, and word cache counts start over when settings change. When
+        false, none of this is done, so there is no extra cost in
+        single-threaded use.
+
+        `exception_files` is a list of paths to extra exception lists. Each is
+        either a TSV file in the same format as the bundled list, which is
+        read into memory, or a file compiled with `cutlet.index.build_index`
+        (or `cutlet compile-exceptions`), which is memory mapped, so it loads
+        instantly and is shared between processes no matter how large it is.
+        Exceptions from TSV files and `Cutlet.add_exception` take priority
+        over compiled files, which take priority over the bundled list.
+
+        `lexicon_path` is a file from `cutlet.lexicon.build_lexicon` (or
+        `cutlet build-lexicon`), with romaji for every reading in the
+        dictionary, which is used instead of converting the readings of known
+        words. It's memory mapped like compiled exception files. A lookup
+        costs a bit less than converting a reading, so this helps little
+        unless the word cache is small. It only applies to the mapping table
+        it was built for; see `Cutlet.lexicon`.
+
         Typical usage:
 
         ```python
@@ -141,8 +432,24 @@ class Cutlet:
             print("unknown system: {}".format(system))
             raise
 
-        self.tagger = fugashi.Tagger(mecab_args)
-        self.exceptions = load_exceptions()
+        self.mecab_args = mecab_args
+        self.word_cache_size = word_cache_size
+        self._word_cache = OrderedDict()
+        self._kana_map = {}
+        self._ascii_exceptions = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        self.thread_safe = thread_safe
+        self._make_tagger()
+        # loaded on first use
+        self.exception_files = tuple(exception_files)
+        self._exceptions = None
+        self._exception_indexes = None
+        self.lexicon_path = lexicon_path
+        # token sequences to romaji; see add_phrase_exception
+        self.phrase_exceptions = {}
+        self._phrase_trie = None
 
         # these are too minor to be worth exposing as arguments
         self.use_tch = self.system in ("hepburn",)
@@ -152,16 +459,367 @@ class Cutlet:
 
         self.use_foreign_spelling = use_foreign_spelling
         self.ensure_ascii = ensure_ascii
+        self.fast_path = fast_path
+
+        self.result_cache = None
+        if cache_path is not None:
+            from .cache import ResultCache
+
+            self.result_cache = ResultCache(cache_path, cache_size)
+
+        # set by enable_stats
+        self.stats = None
+
+        # see configure_async
+        self._async_options = {}
+        self._coalescer = None
+
+    @property
+    def use_foreign_spelling(self):
+        return self._use_foreign_spelling
+
+    @use_foreign_spelling.setter
+    def use_foreign_spelling(self, value):
+        self._use_foreign_spelling = value
+        self._config_changed()
+
+    @property
+    def ensure_ascii(self):
+        return self._ensure_ascii
+
+    @ensure_ascii.setter
+    def ensure_ascii(self, value):
+        self._ensure_ascii = value
+        self._config_changed()
+
+    @property
+    def fast_path(self):
+        return self._fast_path
+
+    @fast_path.setter
+    def fast_path(self, value):
+        # this doesn't change the output for other inputs, so caches are kept
+        self._fast_path = value
+        self._drop_view()
+
+    def _config_changed(self):
+        """Drop anything derived from the current settings."""
+        # replaced rather than cleared in case another thread is using it
+        self._word_cache = OrderedDict()
+        self._kana_map = {}
+        self._ascii_exceptions = None
+        self._fingerprint = None
+        # checked again on next use, as it depends on the mapping table
+        self._lexicon = None
+        # see with_options
+        self._siblings = {}
+        self._drop_view()
+
+    def _drop_view(self):
+        """Make the next call take a new snapshot; see `Cutlet._snapshot`."""
+        if self._view is not self:
+            # Calls already running keep the snapshot they have. The lock
+            # makes sure one taken before this change isn't published after it.
+            with self._lock:
+                self._view = None
+
+    def _snapshot(self):
+        """Return a `Cutlet` whose settings won't change, to run a call on.
+
+        Unless this is thread safe, that's just this `Cutlet`. Otherwise it's
+        a shallow copy, taken when first needed after each change, which
+        shares the tagger and the current (never modified) tables, and has
+        its own caches and siblings, so nothing computed with the old settings
+        can mix with the new ones. Public methods that convert text run on the
+        snapshot when `self._view is not self`.
+        """
+        view = self._view
+        if view is None:
+            # load shared state first, so each snapshot doesn't load its own
+            self.tagger
+            self.exceptions
+            with self._lock:
+                view = self._view
+                if view is None:
+                    view = object.__new__(Cutlet)
+                    view.__dict__.update(self.__dict__)
+                    view._view = view
+                    view._word_cache = OrderedDict()
+                    view._kana_map = {}
+                    view._cache_hits = 0
+                    view._cache_misses = 0
+                    view._ascii_exceptions = None
+                    view._fingerprint = None
+                    view._phrase_trie = None
+                    view._lexicon = None
+                    view._siblings = {}
+                    self._view = view
+        return view
+
+    def fingerprint(self):
+        """Return a hash of everything that can affect the output.
+
+        This covers the system, mapping table, exceptions, options, and
+        dictionary. `fast_path` is not included, since it can be changed per
+        call site; callers that care should include it themselves.
+        """
+        if self._fingerprint is None:
+            dicinfo = [
+                (dd["filename"], dd["size"], dd["version"])
+                for dd in self.tagger.dictionary_info
+            ]
+            config = (
+                self.system,
+                sorted(self.table.items()),
+                sorted(self.exceptions.items()),
+                sorted(self.phrase_exceptions.items()),
+                [index.digest for index in self.exception_indexes],
+                self.use_foreign_spelling,
+                self.ensure_ascii,
+                self.use_tch,
+                self.use_wa,
+                self.use_he,
+                self.use_wo,
+                dicinfo,
+            )
+            digest = hashlib.blake2b(repr(config).encode(), digest_size=16)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _cache_key(self, text, capitalize, title):
+        opts = f"{capitalize:d}{title:d}{self.fast_path:d}"
+        key = f"{self.fingerprint()}\0{opts}\0{text}"
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def enable_stats(self, callback=None):
+        """Start collecting timing statistics, returning a `StageStats`.
+
+        While enabled, each conversion records the time spent on
+        normalization, result cache lookups, the fast path, tagging, building
+        tokens, and joining them into a string, along with counts of unknown
+        words and cache hits. `callback`, if given, is called with each stage
+        name and duration in seconds.
+
+        Collecting stats adds some overhead, and texts in batch methods are
+        processed one at a time, so this is best used for diagnosis or on a
+        sample of traffic. Use `Cutlet.disable_stats` to turn it off.
+        """
+        self.stats = StageStats(callback)
+        self._drop_view()
+        return self.stats
+
+    def disable_stats(self):
+        """Stop collecting statistics."""
+        self.stats = None
+        self._drop_view()
+
+    def cache_info(self):
+        """Report word cache statistics.
+
+        Like `functools.lru_cache`, this returns a named tuple of hits, misses,
+        maximum size, and current size.
+        """
+        if self._view is not self:
+            return self._snapshot().cache_info()
+        return CacheInfo(
+            self._cache_hits,
+            self._cache_misses,
+            self.word_cache_size,
+            len(self._word_cache),
+        )
+
+    def _make_tagger(self):
+        """Prepare to create the tagger, and a lock for the word cache and
+        snapshots if needed; see `Cutlet._snapshot`.
+
+        The tagger itself is created on first use.
+        """
+        self._tagger = None
+        self._lock = threading.Lock() if self.thread_safe else None
+        self._view = None if self.thread_safe else self
+
+    @property
+    def tagger(self):
+        """The tagger, which is a `TaggerPool` if this is thread safe."""
+        if self._tagger is None:
+            if self.thread_safe:
+                self._tagger = TaggerPool(self.mecab_args)
+            else:
+                self._tagger = make_tagger(self.mecab_args)
+        return self._tagger
+
+    @tagger.setter
+    def tagger(self, tagger):
+        self._tagger = tagger
+
+    @property
+    def exceptions(self):
+        """The exceptions dict, loaded on first use.
+
+        This has the bundled list and any TSV files from `exception_files`.
+        """
+        if self._exceptions is None:
+            self._load_exceptions()
+        return self._exceptions
+
+    @exceptions.setter
+    def exceptions(self, exceptions):
+        self._exceptions = exceptions
+
+    @property
+    def exception_indexes(self):
+        """Compiled exception files from `exception_files`, opened on first use."""
+        if self._exception_indexes is None:
+            self._load_exceptions()
+        return self._exception_indexes
+
+    @property
+    def lexicon(self):
+        """The lexicon from `lexicon_path`, or None if there isn't one.
+
+        It's also None if the lexicon was built for a different mapping table
+        or dictionary, including after changes with `Cutlet.update_mapping`,
+        in which case words are converted as usual.
+        """
+        if self._lexicon is None:
+            self._lexicon = False
+            if self.lexicon_path is not None:
+                from .index import StringIndex
+                from .lexicon import FINGERPRINT_KEY
+
+                lexicon = StringIndex(self.lexicon_path)
+                if lexicon.get(FINGERPRINT_KEY) == self.lexicon_fingerprint():
+                    self._lexicon = lexicon
+        return self._lexicon or None
+
+    def lexicon_fingerprint(self):
+        """Return a hash of the settings that a lexicon depends on."""
+        dicinfo = [
+            (dd["filename"], dd["size"], dd["version"])
+            for dd in self.tagger.dictionary_info
+        ]
+        config = (sorted(self.table.items()), self.use_tch, dicinfo)
+        return hashlib.blake2b(repr(config).encode(), digest_size=16).hexdigest()
+
+    def _load_exceptions(self):
+        from .index import StringIndex, is_index
+
+        indexes = []
+        tsv = {}
+        for path in self.exception_files:
+            if is_index(path):
+                indexes.append(StringIndex(path))
+            else:
+                tsv.update(load_exceptions(path))
+        self._exception_indexes = indexes
+
+        if self._exceptions is None:
+            # compiled files take priority over the bundled list
+            exceptions = {
+                key: val
+                for key, val in load_exceptions().items()
+                if not any(key in index for index in indexes)
+            }
+            exceptions.update(tsv)
+            self._exceptions = exceptions
+
+    def warmup(self):
+        """Load everything that is otherwise loaded on first use.
+
+        This creates the tagger, loads exceptions and dependencies, and runs
+        a short conversion, so later calls don't pay any startup costs. It's
+        useful to call this before serving requests. Returns the `Cutlet`.
+        """
+        self.exceptions
+        self.exception_indexes
+        self.lexicon
+        self.romaji("ウォームアップ用の文です。")
+        return self
+
+    def with_options(self, system=None, use_foreign_spelling=None, ensure_ascii=None):
+        """Return a `Cutlet` with different settings that shares this tagger.
+
+        Settings that aren't given are the same as this `Cutlet`. Exceptions
+        are copied, as are mapping updates if the system is the same. The
+        result is kept and returned again for the same settings until this
+        `Cutlet` is changed, so this is cheap to call repeatedly.
+
+        Because the tagger is shared, nodes from one can be passed to the
+        other's `Cutlet.romaji_tokens`, which is how `Cutlet.romaji_variants`
+        converts a text for several systems with a single parse.
+        """
+        if system == "nippon":
+            system = "nihon"
+        if system is None:
+            system = self.system
+        if use_foreign_spelling is None:
+            use_foreign_spelling = self.use_foreign_spelling
+        if ensure_ascii is None:
+            ensure_ascii = self.ensure_ascii
+        key = (system, use_foreign_spelling, ensure_ascii)
+        if key == (self.system, self.use_foreign_spelling, self.ensure_ascii):
+            return self
+
+        siblings = self._siblings
+        sibling = siblings.get(key)
+        if sibling is None:
+            sibling = Cutlet(
+                system,
+                use_foreign_spelling,
+                ensure_ascii,
+                mecab_args=self.mecab_args,
+                word_cache_size=self.word_cache_size,
+                fast_path=self.fast_path,
+                thread_safe=self.thread_safe,
+                exception_files=self.exception_files,
+                lexicon_path=self.lexicon_path,
+            )
+            sibling.tagger = self.tagger
+            sibling.exceptions = dict(self.exceptions)
+            sibling._exception_indexes = self.exception_indexes
+            sibling.phrase_exceptions = dict(self.phrase_exceptions)
+            if system == self.system:
+                sibling.table = dict(self.table)
+            siblings[key] = sibling
+        return sibling
+
+    def __getstate__(self):
+        # The tagger can't be pickled, so it's rebuilt from the arguments.
+        state = self.__dict__.copy()
+        state["_tagger"] = None
+        del state["_lock"]
+        # the database connection can't be shared either
+        state["result_cache"] = None
+        # stats aren't collected from copies, and callbacks may not pickle
+        state["stats"] = None
+        state["_coalescer"] = None
+        state["_async_options"] = {}
+        # caches are rebuilt as needed, and keep copies small
+        state["_word_cache"] = OrderedDict()
+        state["_kana_map"] = {}
+        state["_phrase_trie"] = None
+        state["_lexicon"] = None
+        state["_siblings"] = {}
+        state["_view"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._make_tagger()
 
     def add_exception(self, key, val):
         """Add an exception to the internal list.
 
         An exception overrides a whole token, for example to replace "Toukyou"
         with "Tokyo". Note that it must match the tokenizer output and be a
-        single token to work. To replace longer phrases, you'll need to use a
-        different strategy, like string replacement.
+        single token to work. To replace longer phrases, use
+        `Cutlet.add_phrase_exception`.
         """
-        self.exceptions[key] = val
+        if self.thread_safe:
+            self.exceptions = {**self.exceptions, key: val}
+        else:
+            self.exceptions[key] = val
+        self._config_changed()
 
     def update_mapping(self, key, val):
         """Update mapping table for a single kana.
@@ -179,7 +837,11 @@ class Cutlet:
         cut.romaji("お茶漬け") # Ochaduke
         ```
         """
-        self.table[key] = val
+        if self.thread_safe:
+            self.table = {**self.table, key: val}
+        else:
+            self.table[key] = val
+        self._config_changed()
 
     def slug(self, text):
         """Generate a URL-friendly slug.
@@ -189,9 +851,15 @@ class Cutlet:
         replaced with a single hyphen. Any leading or trailing hyphens are
         stripped.
         """
-        roma = self.romaji(text).lower()
-        slug = re.sub(r"[^a-z0-9]+", "-", roma).strip("-")
-        return slug
+        return slugify(self.romaji(text))
+
+    def slug_many(self, texts):
+        """Generate slugs for an iterable of texts, yielding them in order.
+
+        This is to `Cutlet.slug` as `Cutlet.romaji_many` is to `Cutlet.romaji`.
+        """
+        for roma in self.romaji_many(texts):
+            yield slugify(roma)
 
     def romaji_tokens(self, words, capitalize=True, title=False):
         """Build a list of tokens from input nodes.
@@ -207,106 +875,234 @@ class Cutlet:
         If the text was not normalized before being tokenized, the output is
         undefined. For details of normalization, see `normalize_text`.
 
-        The number of output tokens will equal the number of input nodes.
+        The number of output tokens will equal the number of input nodes. Each
+        token records the offsets of its node in the tokenized text.
         """
+        if self._view is not self:
+            return self._snapshot().romaji_tokens(words, capitalize, title)
 
-        out = []
+        out = list(self._iter_tokens(words, title))
+
+        # capitalize the first letter
+        if capitalize and out and out[0].surface:
+            ss = out[0].surface
+            out[0].surface = ss[0].capitalize() + ss[1:]
+        return out
 
-        for wi, word in enumerate(words):
-            po = out[-1] if out else None
-            pw = words[wi - 1] if wi > 0 else None
-            nw = words[wi + 1] if wi < len(words) - 1 else None
+    def _iter_tokens(self, words, title, as_text=False):
+        """Yield the finished output for each node, apart from capitalization.
+
+        If `as_text` is true, the output for each node is a string, with a
+        space at the end if one should follow, so joining them gives the
+        romaji for the text. Otherwise it's a `Token`.
+
+        This is a single pass over the nodes. The attributes used are read
+        once per node with `node_attrs`, as reading them from the tagger's
+        nodes is relatively slow. Building the output for a node can modify
+        the output before it, so that's kept in local variables and only
+        yielded once the following node has been processed, and any leftover
+        small tsu is removed then. Nodes are consumed lazily with one node of
+        lookahead, plus any more needed to match phrase exceptions.
+        """
+        if self.phrase_exceptions:
+            words = self._match_phrases(words)
+        nodes = map(node_attrs, words)
+        romaji_word = self._romaji_word_cached
+        use_foreign_spelling = self.use_foreign_spelling
+
+        # output for the previous node, which isn't finished yet
+        pending = False
+        psurface = pspace = pforeign = pstart = pend = None
+        ppos1 = None  # pos1 of the previous node
+        end = 0
+        nw = next(nodes, None)
+        while nw is not None:
+            surface, white_space, pos1, pos2, feature, is_unk, char_type, node = nw
+            nw = next(nodes, None)
+            if nw is not None:
+                nsurface, nwhite_space, npos1, npos2, _, _, nchar_type, nnode = nw
+            start = end + len(white_space)
+            end = start + len(surface)
+            space = False
+            foreign = False
+            # whether the spacing rules below are needed
+            check_space = False
+
+            if node.__class__ is PhraseNode:
+                # The first node of a phrase gets all of its romaji, and the
+                # rest are empty. Spacing is decided at the end of the phrase.
+                roma = node.phrase
+                check_space = not (nw and nnode.__class__ is PhraseNode and not nnode.first)
 
             # handle possessive apostrophe as a special case
-            if (
-                word.surface == "'"
-                and (nw and nw.char_type == CHAR_ALPHA and not nw.white_space)
-                and not word.white_space
+            elif (
+                surface == "'"
+                and (nw and nchar_type == CHAR_ALPHA and not nwhite_space)
+                and not white_space
             ):
                 # remove preceeding space
-                if po:
-                    po.space = False
-                out.append(Token(word.surface, False))
-                continue
-
-            # resolve split verbs / adjectives
-            roma = self.romaji_word(word)
-            if roma and po and po.surface and po.surface[-1] == "っ":
-                po.surface = po.surface[:-1] + roma[0]
-            if word.feature.pos2 == "固有名詞":
-                roma = roma.title()
-            if (
-                title
-                and word.feature.pos1 not in ("助詞", "助動詞", "接尾辞")
-                and not (pw and pw.feature.pos1 == "接頭辞")
-            ):
-                roma = roma.title()
-
-            foreign = self.use_foreign_spelling and has_foreign_lemma(word)
-            tok = Token(roma, False, foreign)
-            # handle punctuation with atypical spacing
-            if word.surface in "「『":
-                if po:
-                    po.space = True
-                out.append(tok)
-                continue
-            if roma in "([":
-                if po:
-                    po.space = True
-                out.append(tok)
-                continue
-            if roma == "/":
-                out.append(tok)
-                continue
+                pspace = False
+                roma = surface
 
-            # preserve spaces between ascii tokens
-            if word.surface.isascii() and nw and nw.surface.isascii():
-                use_space = bool(nw.white_space)
-                out.append(Token(word.surface, use_space))
-                continue
+            else:
+                # resolve split verbs / adjectives
+                roma = romaji_word(node, surface, pos1, pos2, feature, is_unk, char_type)
+                if roma and psurface and psurface[-1] == "っ":
+                    psurface = psurface[:-1] + roma[0]
+                if pos2 == "固有名詞":
+                    roma = roma.title()
+                if (
+                    title
+                    and pos1 not in ("助詞", "助動詞", "接尾辞")
+                    and not ppos1 == "接頭辞"
+                ):
+                    roma = roma.title()
+
+                lemma = feature.lemma
+                foreign = bool(
+                    use_foreign_spelling
+                    and lemma
+                    and "-" in lemma
+                    and has_foreign_lemma(node)
+                )
+                # handle punctuation with atypical spacing
+                if surface in "「『" or roma in "([":
+                    if pending:
+                        pspace = True
+                elif roma == "/":
+                    pass
+                # preserve spaces between ascii tokens
+                elif surface.isascii() and nw and nsurface.isascii():
+                    roma = surface
+                    space = bool(nwhite_space)
+                    foreign = False
+                else:
+                    check_space = True
+
+            if check_space:
+                space = True
+                # no space sometimes
+                # お酒 -> osake
+                if pos1 == "接頭辞":
+                    space = False
+                # special case for prefixes
+                elif foreign and roma.endswith("-"):
+                    space = False
+                elif nw:
+                    # 今日、 -> kyou, ; 図書館 -> toshokan
+                    if npos1 in ("補助記号", "接尾辞"):
+                        space = False
+                    # special case for half-width commas
+                    elif nsurface == ",":
+                        space = False
+                    # 思えば -> omoeba
+                    elif npos2 in ("接続助詞"):
+                        space = False
+                    # 333 -> 333 ; this should probably be handled in mecab
+                    elif surface.isdigit() and nsurface.isdigit():
+                        space = False
+                    # そうでした -> sou deshita
+                    elif (
+                        pos1 in ("動詞", "助動詞", "形容詞")
+                        and npos1 == "助動詞"
+                        and nsurface != "です"
+                    ):
+                        space = False
+
+            if pending:
+                # remove any leftover っ
+                if "っ" in psurface:
+                    psurface = psurface.replace("っ", "")
+                if as_text:
+                    yield psurface + " " if pspace else psurface
+                else:
+                    yield Token(psurface, pspace, pforeign, pstart, pend)
+            pending = True
+            psurface, pspace, pforeign, pstart, pend = roma, space, foreign, start, end
+            ppos1 = pos1
+
+        if pending:
+            if "っ" in psurface:
+                psurface = psurface.replace("っ", "")
+            if as_text:
+                yield psurface + " " if pspace else psurface
+            else:
+                yield Token(psurface, pspace, pforeign, pstart, pend)
 
-            out.append(tok)
+    def add_phrase_exception(self, phrase, val):
+        """Add an exception for a phrase that may span several tokens.
 
-            # no space sometimes
-            # お酒 -> osake
-            if word.feature.pos1 == "接頭辞":
-                continue
-            # 今日、 -> kyou, ; 図書館 -> toshokan
-            if nw and nw.feature.pos1 in ("補助記号", "接尾辞"):
-                continue
-            # special case for half-width commas
-            if nw and nw.surface == ",":
-                continue
-            # special case for prefixes
-            if foreign and roma[-1] == "-":
-                continue
-            # 思えば -> omoeba
-            if nw and nw.feature.pos2 in ("接続助詞"):
-                continue
-            # 333 -> 333 ; this should probably be handled in mecab
-            if word.surface.isdigit() and nw and nw.surface.isdigit():
-                continue
-            # そうでした -> sou deshita
-            if (
-                nw
-                and word.feature.pos1 in ("動詞", "助動詞", "形容詞")
-                and nw.feature.pos1 == "助動詞"
-                and nw.surface != "です"
-            ):
-                continue
+        The phrase is tokenized, and wherever the same sequence of tokens
+        appears, the whole sequence is replaced with `val`. For example,
+        `add_phrase_exception("東京タワー", "Tokyo Tower")` works even though the
+        tokenizer splits it into 東京 and タワー. If phrases overlap, the longest
+        match wins, and phrases take priority over single token exceptions.
 
-            # if we get here, it does need a space
-            tok.space = True
+        Matching is done in the same pass that converts the tokens, and costs
+        the same no matter how many phrases there are. Note that a phrase is
+        tokenized without any surrounding text, so it won't match if the
+        tokenizer splits it differently in context.
+        """
+        key = tuple(
+            (" " + word.surface) if ii and word.white_space else word.surface
+            for ii, word in enumerate(self.tagger(normalize_text(phrase)))
+        )
+        if not key:
+            raise ValueError("empty phrase")
+        if self.thread_safe:
+            self.phrase_exceptions = {**self.phrase_exceptions, key: val}
+        else:
+            self.phrase_exceptions[key] = val
+        self._phrase_trie = None
+        self._config_changed()
 
-        # remove any leftover っ
-        for tok in out:
-            tok.surface = tok.surface.replace("っ", "")
+    def _match_phrases(self, words):
+        """Find phrase exceptions in nodes, yielding the nodes in order.
 
-        # capitalize the first letter
-        if capitalize and out and out[0].surface:
-            ss = out[0].surface
-            out[0].surface = ss[0].capitalize() + ss[1:]
-        return out
+        Nodes in a match are yielded as `PhraseNode` objects. At each node the
+        trie is followed as far as the upcoming nodes allow, so this looks
+        ahead at most as many nodes as the longest phrase.
+        """
+        trie = self._phrase_trie
+        if trie is None:
+            trie = self._phrase_trie = build_trie(self.phrase_exceptions)
+
+        words = iter(words)
+        buf = deque()
+        while True:
+            if not buf:
+                word = next(words, None)
+                if word is None:
+                    return
+                buf.append(word)
+
+            node = trie.get(buf[0].surface)
+            size = 0
+            if node is not None:
+                ii = 1
+                if PHRASE_END in node:
+                    size, phrase = ii, node[PHRASE_END]
+                while True:
+                    if ii == len(buf):
+                        word = next(words, None)
+                        if word is None:
+                            break
+                        buf.append(word)
+                    word = buf[ii]
+                    part = (" " + word.surface) if word.white_space else word.surface
+                    node = node.get(part)
+                    if node is None:
+                        break
+                    ii += 1
+                    if PHRASE_END in node:
+                        size, phrase = ii, node[PHRASE_END]
+
+            if not size:
+                yield buf.popleft()
+                continue
+            yield PhraseNode(buf.popleft(), phrase, True)
+            for _ in range(size - 1):
+                yield PhraseNode(buf.popleft(), "", False)
 
     def romaji(self, text, capitalize=True, title=False):
         """Build a complete string from input text.
@@ -321,23 +1117,545 @@ class Cutlet:
         """
         if not text:
             return ""
+        if self._view is not self:
+            return self._snapshot().romaji(text, capitalize, title)
+        if self.stats is not None:
+            return self._romaji_profiled(text, capitalize, title)
+
+        text = normalize_text(text)
+        cache = self.result_cache
+        if cache is None:
+            return self._romaji_normalized(text, capitalize, title)
+
+        key = self._cache_key(text, capitalize, title)
+        out = cache.get(key)
+        if out is None:
+            out = self._romaji_normalized(text, capitalize, title)
+            cache.put(key, out)
+        return out
 
+    def _romaji_profiled(self, text, capitalize, title):
+        """Convert a single text, recording stats for each stage."""
+        stats = self.stats
+        clock = time.perf_counter
+        stats.calls += 1
+        start = clock()
         text = normalize_text(text)
-        print("normalized", text)
-        words = self.tagger(text)
-        print("words", words)
-        for word in words:
-            print(word.surface, word.feature.pron)
-
-        tokens = self.romaji_tokens(words, capitalize, title)
-        out = "".join([str(tok) for tok in tokens]).strip()
+        end = clock()
+        stats.record("normalize", end - start)
+
+        cache = self.result_cache
+        if cache is not None:
+            start = end
+            key = self._cache_key(text, capitalize, title)
+            out = cache.get(key)
+            end = clock()
+            stats.record("cache", end - start)
+            if out is not None:
+                stats.result_cache_hits += 1
+                return out
+            stats.result_cache_misses += 1
+
+        out = None
+        if self.fast_path:
+            start = end
+            out = self._romaji_fast(text, capitalize, title)
+            end = clock()
+            stats.record("fast", end - start)
+            if out is not None:
+                stats.fast_path_hits += 1
+
+        if out is None:
+            start = end
+            words = self.tagger(text)
+            end = clock()
+            stats.record("tag", end - start)
+            stats.nodes += len(words)
+            stats.unk_nodes += sum(1 for word in words if word.is_unk)
+
+            start = end
+            hits, misses = self._cache_hits, self._cache_misses
+            parts = list(self._iter_tokens(words, title, as_text=True))
+            end = clock()
+            stats.record("tokens", end - start)
+            stats.word_cache_hits += self._cache_hits - hits
+            stats.word_cache_misses += self._cache_misses - misses
+
+            start = end
+            if capitalize and parts and parts[0]:
+                ss = parts[0]
+                parts[0] = ss[0].capitalize() + ss[1:]
+            out = "".join(parts).strip()
+            stats.record("join", clock() - start)
+
+        if cache is not None:
+            cache.put(key, out)
         return out
 
+    def _romaji_normalized(self, text, capitalize, title):
+        if self.fast_path:
+            out = self._romaji_fast(text, capitalize, title)
+            if out is not None:
+                return out
+
+        return self._assemble(self.tagger(text), capitalize, title)
+
+    def _assemble(self, words, capitalize, title):
+        """Convert nodes straight to a string, without building tokens."""
+        parts = list(self._iter_tokens(words, title, as_text=True))
+        # capitalize the first letter
+        if capitalize and parts and parts[0]:
+            ss = parts[0]
+            parts[0] = ss[0].capitalize() + ss[1:]
+        return "".join(parts).strip()
+
+    def configure_async(self, executor=None, max_batch_size=256, max_delay=0.002):
+        """Set options for `Cutlet.aromaji` and `Cutlet.aromaji_many`.
+
+        Concurrent async requests are collected into batches, which run on
+        `executor` so the event loop isn't blocked. A batch is started when it
+        has `max_batch_size` requests, or `max_delay` seconds after its first
+        request, whichever is sooner, so the delay caps the latency added by
+        batching.
+
+        If `executor` is None, the event loop's default thread executor is
+        used. Unless this `Cutlet` is thread safe, only one batch runs at a
+        time on a thread executor. With a `ProcessPoolExecutor`, each worker
+        process builds its own copy of this `Cutlet`, and batches run in
+        parallel.
+        """
+        self._async_options = {
+            "executor": executor,
+            "max_batch_size": max_batch_size,
+            "max_delay": max_delay,
+        }
+        self._coalescer = None
+
+    def _get_coalescer(self):
+        import asyncio
+        from .aio import Coalescer
+
+        loop = asyncio.get_running_loop()
+        if self._coalescer is None or self._coalescer.loop is not loop:
+            self._coalescer = Coalescer(self, **self._async_options)
+        return self._coalescer
+
+    async def aromaji(self, text, capitalize=True, title=False):
+        """Async version of `Cutlet.romaji`.
+
+        The work is done on an executor, batched with other concurrent
+        requests; see `Cutlet.configure_async`.
+        """
+        return await self._get_coalescer().submit(text, capitalize, title)
+
+    async def aromaji_many(self, texts, capitalize=True, title=False):
+        """Async version of `Cutlet.romaji_many`, returning a list."""
+        import asyncio
+
+        coalescer = self._get_coalescer()
+        futures = [coalescer.submit(text, capitalize, title) for text in texts]
+        return list(await asyncio.gather(*futures))
+
+    def romaji_stream(self, text, capitalize=True, title=False):
+        """Convert a long document incrementally, yielding pieces of output.
+
+        `text` may be a string or an iterable of strings, like an open file,
+        which can be split anywhere, even within a word. The input is split
+        after sentence-ending punctuation and newlines, and each sentence is
+        tagged separately, so memory use depends on the longest sentence
+        rather than the whole document. Output is yielded as each sentence is
+        finished.
+
+        Context is carried across sentence boundaries, so spacing and other
+        rules that look at neighboring words work as usual, and joining the
+        output gives the same result as `Cutlet.romaji` on the whole text.
+        The exception is that the tagger sees less context at the start of a
+        sentence, so occasionally the first word is analyzed differently.
+        """
+        if self._view is not self:
+            yield from self._snapshot().romaji_stream(text, capitalize, title)
+            return
+        if isinstance(text, str):
+            text = (text,)
+        # number of nodes in each sentence that hasn't been output yet
+        sizes = deque()
+
+        def sentences():
+            # Blocks can be split anywhere, so text after the last sentence
+            # end in a block is held until the next one. It has no sentence
+            # ends itself, so only the new block needs to be split.
+            rest = ""
+            for block in text:
+                chunks = SENTENCE_END.split(block)
+                chunks[0] = rest + chunks[0]
+                rest = chunks.pop()
+                yield from chunks
+            if rest:
+                yield rest
+
+        def nodes():
+            # Whitespace at the end of a sentence is moved to the start of the
+            # next one, as that's where the tagger would put it.
+            carry = ""
+            for chunk in sentences():
+                body = chunk.rstrip()
+                if not body:
+                    carry += chunk
+                    continue
+                words = self.tagger(normalize_text(carry + body))
+                carry = chunk[len(body) :]
+                if words:
+                    sizes.append(len(words))
+                    yield from [NodeInfo(word) for word in words]
+
+        buf = []
+        started = False
+        # whitespace that's only output if more text follows
+        space = ""
+        for ti, part in enumerate(self._iter_tokens(nodes(), title, as_text=True)):
+            if ti == 0 and capitalize and part:
+                part = part[0].capitalize() + part[1:]
+            buf.append(part)
+            if len(buf) < sizes[0]:
+                continue
+
+            sizes.popleft()
+            piece = "".join(buf)
+            buf = []
+            if not started:
+                piece = piece.lstrip()
+            body = piece.rstrip()
+            if body:
+                yield space + body
+                space = piece[len(body) :]
+                started = True
+            elif started:
+                space += piece
+
+    def romaji_alignment(self, text, capitalize=True, title=False):
+        """Align the output of `Cutlet.romaji` with the input text.
+
+        Returns a list with a tuple for each node, `(start, end, roma_start,
+        roma_end)`, where the first two are offsets in the normalized input
+        and the last two are offsets in the output of `Cutlet.romaji` for the
+        same arguments. Nodes that produce no output, like discarded
+        punctuation, have an empty output span.
+
+        Offsets in the input refer to `normalize_text(text)`; if the input is
+        already normalized, that's the same as the input.
+        """
+        if not text:
+            return []
+        if self._view is not self:
+            return self._snapshot().romaji_alignment(text, capitalize, title)
+        tokens = self.romaji_tokens(self.tagger(normalize_text(text)), capitalize, title)
+
+        # The output has surrounding whitespace stripped, so find how much.
+        lead = 0
+        for tok in tokens:
+            if tok.surface.strip():
+                lead += len(tok.surface) - len(tok.surface.lstrip())
+                break
+            lead += len(tok.surface) + tok.space
+        trail = 0
+        for tok in reversed(tokens):
+            trail += tok.space
+            if tok.surface.strip():
+                trail += len(tok.surface) - len(tok.surface.rstrip())
+                break
+            trail += len(tok.surface)
+        total = sum(len(tok.surface) + tok.space for tok in tokens) - lead - trail
+
+        out = []
+        pos = -lead
+        for tok in tokens:
+            roma_start = min(max(pos, 0), total)
+            pos += len(tok.surface)
+            out.append((tok.start, tok.end, roma_start, min(max(pos, 0), total)))
+            pos += tok.space
+        return out
+
+    def romaji_variants(self, text, variants):
+        """Convert text several ways, tagging it only once.
+
+        `variants` maps names to dicts of options, and a dict with the same
+        names and the output for each is returned. The options are `system`,
+        `use_foreign_spelling` and `ensure_ascii`, as for `Cutlet`;
+        `capitalize` and `title`, as for `Cutlet.romaji`; and `slug`, which if
+        true gives the output of `Cutlet.slug` instead. Missing options have
+        the same defaults as those methods, and settings default to this
+        `Cutlet`'s.
+
+        Example usage:
+
+        ```
+        katsu = Cutlet()
+        katsu.romaji_variants("富士山", {
+            "hepburn": {},
+            "kunrei": {"system": "kunrei"},
+            "slug": {"slug": True},
+        })
+        # {"hepburn": "Fuji yama", "kunrei": "Huzi yama", "slug": "fuji-yama"}
+        ```
+
+        The output for each variant is the same as converting the text with
+        a separate `Cutlet`, but normalization and tagging, usually most of
+        the work, are only done once. The result cache is not used.
+        """
+        if self._view is not self:
+            return self._snapshot().romaji_variants(text, variants)
+        plans = self._plan_variants(variants)
+        return self._romaji_variants(normalize_text(text) if text else "", plans)
+
+    def romaji_variants_many(self, texts, variants):
+        """Convert an iterable of texts several ways, yielding dicts in order.
+
+        This is to `Cutlet.romaji_variants` as `Cutlet.romaji_many` is to
+        `Cutlet.romaji`.
+        """
+        if self._view is not self:
+            yield from self._snapshot().romaji_variants_many(texts, variants)
+            return
+        plans = self._plan_variants(variants)
+        for text in texts:
+            yield self._romaji_variants(normalize_text(text) if text else "", plans)
+
+    def _plan_variants(self, variants):
+        """Resolve variant options to (name, cutlet, capitalize, title, slug)."""
+
+        def plan(
+            name,
+            system=None,
+            use_foreign_spelling=None,
+            ensure_ascii=None,
+            capitalize=True,
+            title=False,
+            slug=False,
+        ):
+            katsu = self.with_options(system, use_foreign_spelling, ensure_ascii)
+            return name, katsu._snapshot(), capitalize, title, slug
+
+        return [plan(name, **options) for name, options in variants.items()]
+
+    def _romaji_variants(self, text, plans):
+        """Convert normalized text for each planned variant."""
+        out = {}
+        words = None
+        for name, katsu, capitalize, title, slug in plans:
+            roma = None
+            if not text:
+                roma = ""
+            elif katsu.fast_path:
+                roma = katsu._romaji_fast(text, capitalize, title)
+            if roma is None:
+                if words is None:
+                    # nodes stay valid, since siblings don't use the tagger
+                    words = self.tagger(text)
+                roma = katsu._assemble(words, capitalize, title)
+            if slug:
+                roma = slugify(roma)
+            out[name] = roma
+        return out
+
+    def romaji_many(self, texts, capitalize=True, title=False):
+        """Convert an iterable of texts, yielding romaji strings in order.
+
+        The output for each item is the same as calling `Cutlet.romaji` on it
+        with the same options, but lookups and setup are done once for the
+        whole batch, so this is faster for large inputs. Items are processed
+        lazily, so any iterable (like an open file) may be passed.
+        """
+        if self._view is not self:
+            yield from self._snapshot().romaji_many(texts, capitalize, title)
+            return
+        if self.stats is not None:
+            for text in texts:
+                yield self.romaji(text, capitalize, title)
+            return
+
+        texts = (normalize_text(text) if text else "" for text in texts)
+        if self.result_cache is None:
+            yield from self._romaji_normalized_many(texts, capitalize, title)
+        else:
+            yield from self._romaji_cached_many(texts, capitalize, title)
+
+    def romaji_dedup(self, texts, capitalize=True, title=False, workers=None):
+        """Convert texts, converting each distinct text only once.
+
+        Inputs are normalized and indexed by their normalized form, only the
+        distinct ones are converted, and the results are put back in input
+        order. This is useful when the input has many duplicates, like lists
+        of shop names or categories, though it has to hold every input and
+        output in memory, unlike `Cutlet.romaji_many`.
+
+        Returns a `DedupResult`, with the outputs in `results` and counts to
+        see how much was saved. If `workers` is more than one, distinct texts
+        are converted as with `Cutlet.romaji_parallel`.
+        """
+        # Raw texts are indexed too, so exact repeats aren't even normalized.
+        seen = {}
+        index = {}
+        uniques = []
+        codes = []
+        for text in texts:
+            code = seen.get(text)
+            if code is None:
+                norm = normalize_text(text) if text else ""
+                code = index.get(norm)
+                if code is None:
+                    code = index[norm] = len(uniques)
+                    uniques.append(norm)
+                seen[text] = code
+            codes.append(code)
+
+        if workers is not None and workers > 1:
+            results = self.romaji_parallel(uniques, capitalize, title, workers)
+        else:
+            results = self.romaji_many(uniques, capitalize, title)
+        results = list(results)
+        return DedupResult([results[code] for code in codes], len(codes), len(uniques))
+
+    def _romaji_cached_many(self, texts, capitalize, title, chunksize=1000):
+        """Convert normalized texts, using the result cache in bulk."""
+        from .parallel import chunked
+
+        cache = self.result_cache
+        for chunk in chunked(texts, chunksize):
+            keys = [self._cache_key(text, capitalize, title) for text in chunk]
+            found = cache.get_many(keys)
+            missed = [ii for ii, key in enumerate(keys) if key not in found]
+            results = self._romaji_normalized_many(
+                [chunk[ii] for ii in missed], capitalize, title
+            )
+            computed = list(zip([keys[ii] for ii in missed], results))
+            cache.put_many(computed)
+            found.update(computed)
+            yield from (found[key] for key in keys)
+
+    def _romaji_normalized_many(self, texts, capitalize, title):
+        """Convert already normalized texts."""
+        parse = self.tagger.parseToNodeList
+        assemble = self._assemble
+        fast = self._romaji_fast if self.fast_path else None
+        for text in texts:
+            if not text:
+                yield ""
+                continue
+            if fast:
+                out = fast(text, capitalize, title)
+                if out is not None:
+                    yield out
+                    continue
+            yield assemble(parse(text), capitalize, title)
+
+    def _romaji_fast(self, text, capitalize, title):
+        """Convert normalized text without the tagger, if possible.
+
+        Returns None if the text isn't eligible. See the `fast_path` argument
+        to `Cutlet` for details.
+        """
+        if text.isascii():
+            # title case depends on parts of speech, so that needs the tagger
+            if title or not text.replace(" ", "").isalnum():
+                return None
+            if self._ascii_exceptions is None:
+                self._ascii_exceptions = (
+                    any(key.isascii() for key in self.exceptions)
+                    or any("".join(key).isascii() for key in self.phrase_exceptions)
+                    or any(index.has_ascii_keys for index in self.exception_indexes)
+                )
+            if self._ascii_exceptions:
+                return None
+            out = " ".join(text.split())
+        elif KANA_ONLY.fullmatch(text):
+            try:
+                out = self.map_kana(_kata2hira(text))
+            except KeyError:
+                # unusual kana with no mapping, let the normal path handle it
+                return None
+            out = out.replace("っ", "")
+            if not out:
+                # like a lone small kana, which the tagger may read as a full one
+                return None
+        else:
+            return None
+
+        if capitalize and out:
+            out = out[0].capitalize() + out[1:]
+        return out
+
+    def romaji_parallel(
+        self, texts, capitalize=True, title=False, workers=None, chunksize=256
+    ):
+        """Convert an iterable of texts using multiple processes.
+
+        Each worker process gets its own copy of this `Cutlet`, including any
+        exceptions or mapping updates. Texts are sent to the workers in chunks
+        of `chunksize`, and results are yielded in input order. If `workers` is
+        not given, one per CPU is used.
+
+        Starting the workers takes time, so this is only faster than
+        `Cutlet.romaji_many` for large inputs. If you are on a platform that
+        doesn't fork, like Windows, this must be called from code guarded by
+        `if __name__ == "__main__"`.
+        """
+        from .parallel import WorkerPool
+
+        with WorkerPool(self, workers) as pool:
+            yield from pool.imap(
+                "romaji_many", texts, chunksize, capitalize=capitalize, title=title
+            )
+
     def romaji_word(self, word):
         """Return the romaji for a single word (node)."""
-
+        if self._view is not self:
+            return self._snapshot().romaji_word(word)
+        surface, _, pos1, pos2, feature, is_unk, char_type, _ = node_attrs(word)
+        return self._romaji_word_cached(
+            word, surface, pos1, pos2, feature, is_unk, char_type
+        )
+
+    def _romaji_word_cached(self, word, surface, pos1, pos2, feature, is_unk, char_type):
+        """Return the romaji for a node, given attributes from `node_attrs`."""
+        if not self.word_cache_size:
+            return self._romaji_word(word)
+
+        key = (
+            surface,
+            pos1,
+            pos2,
+            feature.kana,
+            feature.lemma,
+            feature.pron,
+            is_unk,
+            char_type,
+        )
+        cache = self._word_cache
+        lock = self._lock
+        if lock is not None:
+            lock.acquire()
+        try:
+            roma = cache[key]
+        except KeyError:
+            self._cache_misses += 1
+            roma = cache[key] = self._romaji_word(word)
+            if len(cache) > self.word_cache_size:
+                cache.popitem(last=False)
+        else:
+            self._cache_hits += 1
+            cache.move_to_end(key)
+        finally:
+            if lock is not None:
+                lock.release()
+        return roma
+
+    def _romaji_word(self, word):
         if word.surface in self.exceptions:
             return self.exceptions[word.surface]
+        for index in self.exception_indexes:
+            roma = index.get(word.surface)
+            if roma is not None:
+                return roma
 
         if word.surface.isdigit():
             return word.surface
@@ -351,7 +1669,7 @@ class Cutlet:
             # Check character type using the values defined in char.def.
             # This is constant across unidic versions so far but not guaranteed.
             if word.char_type in (CHAR_HIRAGANA, CHAR_KATAKANA):
-                kana = jaconv.kata2hira(word.surface)
+                kana = _kata2hira(word.surface)
                 return self.map_kana(kana)
 
             # At this point this is an unknown word and not kana. Could be
@@ -385,7 +1703,12 @@ class Cutlet:
             return word.feature.lemma.split("-", 1)[-1]
         elif word.feature.kana:
             # for known words
-            kana = jaconv.kata2hira(word.feature.kana)
+            lexicon = self.lexicon
+            if lexicon is not None:
+                roma = lexicon.get(word.feature.kana)
+                if roma is not None:
+                    return roma
+            kana = _kata2hira(word.feature.kana)
             return self.map_kana(kana)
         else:
             # unclear when we would actually get here
@@ -396,13 +1719,26 @@ class Cutlet:
 
         The exact romaji resulting from a kana sequence depend on the preceding
         or following kana, so this handles that conversion.
+
+        Mappings for each kana in context are compiled from the mapping table
+        as they're first seen, so most kana only need a single lookup.
         """
-        out = ""
-        for ki, char in enumerate(kana):
-            nk = kana[ki + 1] if ki < len(kana) - 1 else None
-            pk = kana[ki - 1] if ki > 0 else None
-            out += self.get_single_mapping(pk, char, nk)
-        return out
+        if self._view is not self:
+            return self._snapshot().map_kana(kana)
+        compiled = self._kana_map
+        out = []
+        pk = None
+        last = len(kana) - 1
+        for ki, kk in enumerate(kana):
+            nk = kana[ki + 1] if ki < last else None
+            key = (pk, kk, nk)
+            try:
+                out.append(compiled[key])
+            except KeyError:
+                roma = compiled[key] = self.get_single_mapping(pk, kk, nk)
+                out.append(roma)
+            pk = kk
+        return "".join(out)
 
     def get_single_mapping(self, pk, kk, nk):
         """Given a single kana and its neighbors, return the mapped romaji."""
@@ -0,0 +1,98 @@
+"""Romanize whole pandas or Arrow columns.
+
+Columns often repeat the same values many times, as with categories or place
+names. These functions find the distinct values first, using the library's
+own vectorized routines, convert each of them once with the batch methods of
+`Cutlet`, and then build an output column aligned with the input. Missing
+values stay missing.
+
+pandas and pyarrow are optional dependencies, and are only imported by the
+function that needs them.
+
+Example usage:
+
+```
+from cutlet import Cutlet
+from cutlet.frame import romaji_series
+
+katsu = Cutlet()
+df["name_romaji"] = romaji_series(katsu, df["name"])
+```
+"""
+
+
+def convert_unique(
+    katsu, texts, capitalize=True, title=False, slug=False, workers=None, chunksize=256
+):
+    """Convert a list of distinct texts, returning a list of results.
+
+    If `workers` is more than one, a `WorkerPool` with that many processes is
+    used, as in `Cutlet.romaji_parallel`.
+    """
+    if slug:
+        method, kwargs = "slug_many", {}
+    else:
+        method, kwargs = "romaji_many", {"capitalize": capitalize, "title": title}
+    if workers is not None and workers > 1:
+        from .parallel import WorkerPool
+
+        with WorkerPool(katsu, workers) as pool:
+            return list(pool.imap(method, texts, chunksize, **kwargs))
+    return list(getattr(katsu, method)(texts, **kwargs))
+
+
+def romaji_series(katsu, series, capitalize=True, title=False, slug=False, workers=None):
+    """Convert a pandas Series of strings, returning a new Series.
+
+    The result has the same index and name. If the input has the `string`
+    dtype, so does the output; otherwise it's `object`. The options are as
+    for `Cutlet.romaji`, or `Cutlet.slug` if `slug` is true, and `workers` is
+    as for `convert_unique`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # missing values get the code -1
+    codes, uniques = pd.factorize(series)
+    results = convert_unique(
+        katsu, list(uniques), capitalize, title, slug, workers=workers
+    )
+    # with an extra None at the end, -1 picks it out
+    values = np.empty(len(results) + 1, dtype=object)
+    values[:-1] = results
+    values[-1] = None
+
+    out = pd.Series(values[codes], index=series.index, name=series.name)
+    if isinstance(series.dtype, pd.StringDtype):
+        out = out.astype(series.dtype)
+    return out
+
+
+def romaji_arrow(katsu, array, capitalize=True, title=False, slug=False, workers=None):
+    """Convert a pyarrow string array, returning a new array.
+
+    A `ChunkedArray` is combined into a single array first. The output has
+    the same type as the input (`string` or `large_string`), or for a
+    dictionary array, the type of its values. Other options are as for
+    `romaji_series`.
+    """
+    import pyarrow as pa
+
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if pa.types.is_dictionary(array.type):
+        encoded = array
+    else:
+        # nulls are left out of the dictionary, and stay null in the indices
+        encoded = array.dictionary_encode()
+    results = convert_unique(
+        katsu,
+        encoded.dictionary.to_pylist(),
+        capitalize,
+        title,
+        slug,
+        workers=workers,
+    )
+    dictionary = pa.array(results, type=encoded.type.value_type)
+    out = pa.DictionaryArray.from_arrays(encoded.indices, dictionary)
+    return out.dictionary_decode()
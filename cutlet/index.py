@@ -0,0 +1,151 @@
+"""Compiled exception lists that are read from disk as needed.
+
+A large exception list takes a long time to parse and a lot of memory to keep
+as a dict, and each worker process would need its own copy. `build_index`
+writes the list once to a file holding a hash table, and `StringIndex` looks
+up keys in that file through a memory map. Opening it is instant, and the
+pages are shared by every process using the same file.
+
+The file layout, with all numbers little-endian, is:
+
+- a header: `MAGIC`, the number of entries, the number of hash slots, flags,
+  and a 16-byte digest of the contents
+- `2 * entries + 1` 64-bit offsets into the data; entry `i` has its key from
+  offset `2i` to `2i + 1`, and its value from there to `2i + 2`
+- the hash slots, 32-bit entry numbers plus one, with zero for empty slots,
+  probed linearly from the CRC-32 of the key
+- the keys and values, encoded as UTF-8
+"""
+
+import hashlib
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"CUTLETX1"
+HEADER = struct.Struct("<8sQQQ16s")
+# flags
+HAS_ASCII_KEYS = 1
+
+
+def is_index(path):
+    """Check if a file is a compiled index, based on its first bytes."""
+    with open(path, "rb") as infile:
+        return infile.read(len(MAGIC)) == MAGIC
+
+
+def build_index(pairs, path):
+    """Write an index of (key, value) string pairs to `path`.
+
+    If a key appears more than once, the last value is used. Returns the
+    number of entries.
+    """
+    entries = dict(pairs)
+    # Keep the table at most half full, so probes are short.
+    size = 1
+    while size < len(entries) * 2:
+        size *= 2
+
+    offsets = array("Q", [0])
+    slots = array("I", bytes(4 * size))
+    data = bytearray()
+    digest = hashlib.blake2b(digest_size=16)
+    flags = 0
+    mask = size - 1
+    for ii, (key, val) in enumerate(entries.items()):
+        if key.isascii():
+            flags |= HAS_ASCII_KEYS
+        kb = key.encode("utf-8")
+        vb = val.encode("utf-8")
+        digest.update(struct.pack("<II", len(kb), len(vb)) + kb + vb)
+        data += kb
+        offsets.append(len(data))
+        data += vb
+        offsets.append(len(data))
+
+        slot = zlib.crc32(kb) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = ii + 1
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        slots.byteswap()
+    with open(path, "wb") as outfile:
+        outfile.write(HEADER.pack(MAGIC, len(entries), size, flags, digest.digest()))
+        offsets.tofile(outfile)
+        slots.tofile(outfile)
+        outfile.write(data)
+    return len(entries)
+
+
+class StringIndex:
+    """A read-only mapping of strings to strings in a file from `build_index`.
+
+    This supports `get`, `in`, and `len`. Pickling an index only saves the
+    path, so copies sent to other processes map the same file.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as infile:
+            self._map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, size, flags, digest = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"not a compiled exception index: {self.path}")
+        if sys.byteorder != "little":
+            self._map.close()
+            raise ValueError("compiled indexes are only supported on little-endian machines")
+
+        self.count = count
+        self.has_ascii_keys = bool(flags & HAS_ASCII_KEYS)
+        # identifies the contents, for cache keys
+        self.digest = digest.hex()
+        self._mask = size - 1
+
+        start = HEADER.size
+        end = start + 8 * (2 * count + 1)
+        view = memoryview(self._map)
+        self._offsets = view[start:end].cast("Q")
+        self._slots = view[end : end + 4 * size].cast("I")
+        self._data = end + 4 * size
+        view.release()
+
+    def get(self, key, default=None):
+        kb = key.encode("utf-8")
+        slots = self._slots
+        offsets = self._offsets
+        data = self._map
+        base = self._data
+        mask = self._mask
+        slot = zlib.crc32(kb) & mask
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return default
+            ii = 2 * (entry - 1)
+            start = base + offsets[ii]
+            mid = base + offsets[ii + 1]
+            if data[start:mid] == kb:
+                return data[mid : base + offsets[ii + 2]].decode("utf-8")
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._offsets.release()
+        self._slots.release()
+        self._map.close()
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
@@ -0,0 +1,80 @@
+"""Precomputed romaji for the words in the installed dictionary.
+
+Most known words are converted by mapping their kana reading to romaji, which
+only depends on the mapping table. `build_lexicon` reads every entry in the
+tagger's dictionary files, converts each distinct reading once, and writes the
+results to a compiled index (see `cutlet.index`). A `Cutlet` given the file as
+`lexicon_path` then looks readings up instead of converting them.
+
+Dictionary files are read directly. A MeCab dictionary has a header, then a
+double array used to look up surfaces, then a fixed-size record for each
+entry, and finally the entries' features as null-terminated strings. Only the
+records and features are needed here.
+"""
+
+import csv
+import mmap
+import struct
+
+# magic, version, type, lexsize, lsize, rsize, dsize, tsize, fsize, dummy, charset
+DIC_HEADER = struct.Struct("<10I32s")
+DIC_MAGIC = 0xEF718F77
+# lcAttr, rcAttr, posid, wcost, feature offset, compound
+DIC_TOKEN = struct.Struct("<HHHhII")
+
+# Features never contain a null byte, so this can't clash with a reading.
+FINGERPRINT_KEY = "\0fingerprint"
+
+
+def read_features(path):
+    """Yield the raw feature string of each entry in a MeCab dictionary file."""
+    with open(path, "rb") as infile:
+        data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        header = DIC_HEADER.unpack_from(data)
+        magic, dsize, tsize = header[0], header[6], header[7]
+        if magic ^ DIC_MAGIC != len(data):
+            raise ValueError(f"not a MeCab dictionary: {path}")
+        tokens = DIC_HEADER.size + dsize
+        features = tokens + tsize
+        for token in DIC_TOKEN.iter_unpack(data[tokens:features]):
+            start = features + token[4]
+            yield data[start : data.find(b"\0", start)].decode("utf-8")
+    finally:
+        data.close()
+
+
+def build_lexicon(katsu, path):
+    """Write the romaji for every reading in `katsu`'s dictionaries to `path`.
+
+    The file is only valid for the mapping table and dictionary it was built
+    with; see `Cutlet.lexicon`. Returns the number of readings.
+    """
+    from .index import build_index
+
+    import jaconv
+
+    fields = katsu.tagger("あ")[0].feature._fields
+    kana_field = fields.index("kana")
+    readings = {}
+    for dic in katsu.tagger.dictionary_info:
+        for feature in read_features(dic["filename"]):
+            if '"' in feature:
+                row = next(csv.reader([feature]))
+            else:
+                row = feature.split(",")
+            if len(row) <= kana_field:
+                continue
+            kana = row[kana_field]
+            if kana in readings or kana == "*" or not kana:
+                continue
+            try:
+                readings[kana] = katsu.map_kana(jaconv.kata2hira(kana))
+            except KeyError:
+                # leave unusual kana to the normal conversion
+                readings[kana] = None
+
+    pairs = [(kana, roma) for kana, roma in readings.items() if roma is not None]
+    pairs.append((FINGERPRINT_KEY, katsu.lexicon_fingerprint()))
+    build_index(pairs, path)
+    return len(pairs) - 1
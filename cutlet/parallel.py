@@ -0,0 +1,92 @@
+"""Multi-process conversion.
+
+A `Cutlet` holds a MeCab tagger, which can't be shared between processes, so
+each worker process rebuilds its own `Cutlet` from a pickled copy of the
+parent's configuration (see `Cutlet.__getstate__`).
+"""
+
+import itertools
+import os
+import pickle
+from collections import deque
+
+# the Cutlet owned by the current worker process
+_worker_cutlet = None
+
+
+def load_worker_cutlet(state):
+    """Unpickle a `Cutlet` for a worker process.
+
+    A worker runs one task at a time, so a thread safe `Cutlet` is made
+    single threaded, without a tagger pool, locks, or snapshots.
+    """
+    cutlet = pickle.loads(state)
+    if cutlet.thread_safe:
+        cutlet.thread_safe = False
+        cutlet._make_tagger()
+    return cutlet
+
+
+def _init_worker(state):
+    global _worker_cutlet
+    _worker_cutlet = load_worker_cutlet(state)
+
+
+def _run_chunk(method, chunk, kwargs):
+    func = getattr(_worker_cutlet, method)
+    return list(func(chunk, **kwargs))
+
+
+def chunked(items, size):
+    """Split an iterable into lists of at most `size` items."""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class WorkerPool:
+    def __init__(self, cutlet, workers=None):
+        """Start a pool of worker processes, each with a copy of `cutlet`.
+
+        Any exceptions or mapping changes made to `cutlet` before the pool is
+        created are included in the copies; later changes are not.
+
+        If `workers` is not given, one worker per CPU is used.
+        """
+        import multiprocessing
+
+        self.workers = workers or os.cpu_count() or 1
+        state = pickle.dumps(cutlet)
+        self._pool = multiprocessing.Pool(self.workers, _init_worker, (state,))
+
+    def imap(self, method, texts, chunksize=256, **kwargs):
+        """Call a batch method of the worker `Cutlet`s on texts, in chunks.
+
+        `method` is the name of a method that takes an iterable of texts, like
+        `romaji_many`. Results are yielded in input order. Input is consumed
+        lazily, with a bounded number of chunks in flight, so memory use stays
+        flat for arbitrarily long inputs.
+        """
+        pending = deque()
+        limit = self.workers * 2
+        for chunk in chunked(texts, chunksize):
+            args = (method, chunk, kwargs)
+            pending.append(self._pool.apply_async(_run_chunk, args))
+            if len(pending) >= limit:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+    def close(self):
+        """Stop the worker processes."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
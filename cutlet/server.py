@@ -0,0 +1,178 @@
+"""A local conversion server, and a client for it.
+
+Starting a `Cutlet` means loading the dictionary and other data, which can
+take longer than the actual conversion for small jobs. `cutlet serve` keeps a
+warm `Cutlet`, or a pool of worker processes, and answers requests over a Unix
+socket or a local TCP port, so many short-lived commands can share it.
+
+The protocol is one JSON object per line in each direction. A request looks
+like this:
+
+    {"texts": ["カツカレー"], "mode": "romaji", "capitalize": true, "title": false}
+
+`mode` may be `romaji` or `slug`, and all keys except `texts` are optional. A
+`system` key may also be given, and the request fails if it doesn't match the
+server's system. The response is `{"results": [...]}` with one result per
+text, in order, or `{"error": "..."}`.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+
+from .parallel import WorkerPool
+
+
+def parse_address(address):
+    """Return a socket family and address for a path or `host:port` string."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def batch_method(mode="romaji", capitalize=True, title=False):
+    """Return the name and arguments of the Cutlet batch method for a mode."""
+    if mode == "slug":
+        return "slug_many", {}
+    if mode == "romaji":
+        return "romaji_many", {"capitalize": capitalize, "title": title}
+    raise ValueError(f"unknown mode: {mode}")
+
+
+class Engine:
+    def __init__(self, cutlet, workers=1, chunksize=256):
+        """Convert requests using `cutlet`, or copies of it in worker processes.
+
+        With one worker, `cutlet` is used directly, so it should be thread
+        safe if requests are handled in threads.
+        """
+        self.cutlet = cutlet
+        self.chunksize = chunksize
+        self.pool = WorkerPool(cutlet, workers) if workers > 1 else None
+
+    def handle(self, request):
+        """Answer a request dict with a response dict."""
+        try:
+            system = request.get("system")
+            if system == "nippon":
+                system = "nihon"
+            if system is not None and system != self.cutlet.system:
+                raise ValueError(
+                    f"server uses {self.cutlet.system}, request asked for {system}"
+                )
+            method, kwargs = batch_method(
+                request.get("mode", "romaji"),
+                request.get("capitalize", True),
+                request.get("title", False),
+            )
+            texts = request["texts"]
+            if self.pool is not None:
+                results = self.pool.imap(method, texts, self.chunksize, **kwargs)
+            else:
+                results = getattr(self.cutlet, method)(texts, **kwargs)
+            return {"results": list(results)}
+        except Exception as err:
+            return {"error": f"{type(err).__name__}: {err}"}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as err:
+                response = {"error": f"invalid request: {err}"}
+            else:
+                response = self.server.engine.handle(request)
+            data = json.dumps(response, ensure_ascii=False) + "\n"
+            self.wfile.write(data.encode("utf-8"))
+            self.wfile.flush()
+
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(engine, address):
+    """Create a server for `engine` listening on `address`.
+
+    `address` is a path for a Unix socket, or `host:port` for TCP. Only bind
+    to local addresses; there is no authentication. A socket left at the path
+    by a server that didn't exit cleanly is replaced, but any other kind of
+    file is an error.
+    """
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.lexists(addr):
+            if not stat.S_ISSOCK(os.lstat(addr).st_mode):
+                raise FileExistsError(f"not a socket: {addr}")
+            os.unlink(addr)
+        server = UnixServer(addr, RequestHandler)
+    else:
+        server = TCPServer(addr, RequestHandler)
+    server.engine = engine
+    return server
+
+
+def remove_socket(server):
+    """Delete the socket file of a server from `make_server`, if it has one."""
+    if server.address_family == socket.AF_UNIX:
+        try:
+            os.unlink(server.server_address)
+        except FileNotFoundError:
+            pass
+
+
+class Client:
+    def __init__(self, address):
+        """Connect to a server at `address`, as given to `make_server`."""
+        family, addr = parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.connect(addr)
+        self._rfile = self._sock.makefile("rb")
+
+    def request(self, texts, mode="romaji", capitalize=True, title=False, system=None):
+        """Convert a list of texts on the server, returning a list of results."""
+        request = {
+            "texts": list(texts),
+            "mode": mode,
+            "capitalize": capitalize,
+            "title": title,
+        }
+        if system is not None:
+            request["system"] = system
+        data = json.dumps(request, ensure_ascii=False) + "\n"
+        self._sock.sendall(data.encode("utf-8"))
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["results"]
+
+    def close(self):
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
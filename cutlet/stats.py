@@ -0,0 +1,73 @@
+"""Timing statistics for the stages of conversion.
+
+See `Cutlet.enable_stats` for usage.
+"""
+
+STAGES = ("normalize", "cache", "fast", "tag", "tokens", "join")
+
+# Histogram bucket i counts timings under 2**i microseconds; the last bucket
+# gets everything longer.
+BUCKETS = 24
+
+
+class StageStats:
+    def __init__(self, callback=None):
+        """Create an empty set of statistics.
+
+        If `callback` is given, it's called with the stage name and elapsed
+        seconds every time a stage is timed, which is useful for forwarding
+        timings to an external metrics system.
+        """
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        """Clear all counts and timings."""
+        # number of texts converted
+        self.calls = 0
+        # nodes from the tagger, and how many of them were unknown words
+        self.nodes = 0
+        self.unk_nodes = 0
+        self.word_cache_hits = 0
+        self.word_cache_misses = 0
+        self.result_cache_hits = 0
+        self.result_cache_misses = 0
+        self.fast_path_hits = 0
+        # cumulative seconds per stage
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self.counts = dict.fromkeys(STAGES, 0)
+        self.histograms = {stage: [0] * BUCKETS for stage in STAGES}
+
+    def record(self, stage, seconds):
+        """Add a timing for a stage."""
+        self.totals[stage] += seconds
+        self.counts[stage] += 1
+        bucket = min(int(seconds * 1_000_000).bit_length(), BUCKETS - 1)
+        self.histograms[stage][bucket] += 1
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def as_dict(self):
+        """Return all statistics as a plain dict, for export."""
+        out = {
+            key: getattr(self, key)
+            for key in (
+                "calls",
+                "nodes",
+                "unk_nodes",
+                "word_cache_hits",
+                "word_cache_misses",
+                "result_cache_hits",
+                "result_cache_misses",
+                "fast_path_hits",
+            )
+        }
+        out["stages"] = {
+            stage: {
+                "total": self.totals[stage],
+                "count": self.counts[stage],
+                "histogram": list(self.histograms[stage]),
+            }
+            for stage in STAGES
+        }
+        return out
@@ -244,3 +244,546 @@ def test_foreign_token_feature(text, is_foreign):
     res = cut.romaji_tokens(toks)
     for tok, gold in zip(res, is_foreign):
         assert tok.foreign == gold, "Token's `foreign` feature is wrong"
+
+
+def test_romaji_many():
+    cut = Cutlet()
+    texts = [ja for ja, _ in SENTENCES] + ["", None]
+    golds = [cut.romaji(text) for text in texts]
+    assert list(cut.romaji_many(texts)) == golds
+    golds = [cut.romaji(text, title=True) for text in texts]
+    assert list(cut.romaji_many(iter(texts), title=True)) == golds
+
+
+def test_romaji_dedup():
+    cut = Cutlet()
+    # the last text is a duplicate after normalization
+    texts = [ja for ja, _ in SENTENCES] * 3 + ["", None, "ｶﾚｰ", "カレー"]
+    golds = [cut.romaji(text) for text in texts]
+    out = cut.romaji_dedup(texts)
+    assert out.results == golds
+    assert out.total == len(texts)
+    assert out.unique == len(SENTENCES) + 2
+    assert out.ratio == out.total / out.unique
+    assert cut.romaji_dedup(texts, workers=2).results == golds
+    assert cut.romaji_dedup([]) == ([], 0, 0)
+    assert cut.romaji_dedup([]).ratio == 1.0
+
+
+def test_romaji_variants():
+    cut = Cutlet()
+    cut.add_exception("本", "book")
+    variants = {
+        "hepburn": {},
+        "kunrei": {"system": "kunrei"},
+        "nihon": {"system": "nippon", "title": True},
+        "slug": {"slug": True},
+        "plain": {"use_foreign_spelling": False, "capitalize": False},
+    }
+    kunrei = Cutlet("kunrei")
+    kunrei.add_exception("本", "book")
+    nihon = Cutlet("nihon")
+    nihon.add_exception("本", "book")
+    plain = Cutlet(use_foreign_spelling=False)
+    plain.add_exception("本", "book")
+
+    texts = [ja for ja, _ in SENTENCES] + ["本を読む", "", None]
+    golds = [
+        {
+            "hepburn": cut.romaji(text),
+            "kunrei": kunrei.romaji(text),
+            "nihon": nihon.romaji(text, title=True),
+            "slug": cut.slug(text) if text else "",
+            "plain": plain.romaji(text, capitalize=False),
+        }
+        for text in texts
+    ]
+    assert [cut.romaji_variants(text, variants) for text in texts] == golds
+    assert list(cut.romaji_variants_many(texts, variants)) == golds
+
+    # siblings share the tagger and follow changes
+    assert cut.with_options("kunrei").tagger is cut.tagger
+    assert cut.with_options() is cut
+    cut.update_mapping("づ", "du")
+    out = cut.romaji_variants("お茶漬け", {"h": {}, "k": {"system": "kunrei"}})
+    assert out == {"h": "Ochaduke", "k": "Otyazuke"}
+
+    with pytest.raises(TypeError):
+        cut.romaji_variants("本", {"bad": {"colour": "red"}})
+
+
+def test_romaji_parallel():
+    cut = Cutlet()
+    cut.add_exception("本", "book")
+    cut.update_mapping("づ", "du")
+    texts = [ja for ja, _ in SENTENCES] + ["本を読む", "お茶漬け"]
+    golds = [cut.romaji(text) for text in texts]
+    assert list(cut.romaji_parallel(texts, workers=2, chunksize=3)) == golds
+
+
+def test_worker_cutlet():
+    import pickle
+    from cutlet.cutlet import TaggerPool
+    from cutlet.parallel import load_worker_cutlet
+
+    cut = Cutlet(thread_safe=True)
+    cut.add_exception("本", "book")
+    copy = load_worker_cutlet(pickle.dumps(cut))
+    assert not copy.thread_safe and copy._lock is None
+    assert not isinstance(copy.tagger, TaggerPool)
+    assert copy.romaji("本を読む") == cut.romaji("本を読む") == "Book wo yomu"
+
+
+def test_pickle():
+    import pickle
+
+    cut = Cutlet("kunrei")
+    cut.add_exception("本", "book")
+    copy = pickle.loads(pickle.dumps(cut))
+    for ja, _ in SENTENCES:
+        assert copy.romaji(ja) == cut.romaji(ja)
+
+
+def test_lazy_import():
+    import subprocess
+    import sys
+
+    # heavy dependencies are only loaded when they're needed
+    script = (
+        "import sys, cutlet\n"
+        "katsu = cutlet.Cutlet()\n"
+        "print(' '.join(sorted(set(sys.modules) & "
+        "{'fugashi', 'asyncio', 'sqlite3', 'multiprocessing'})))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    )
+    assert out.stdout.strip() == ""
+
+    cut = Cutlet()
+    assert cut._tagger is None
+    assert cut.warmup() is cut
+    assert cut._tagger is not None
+
+
+def test_word_cache():
+    cut = Cutlet(word_cache_size=4)
+    assert cut.romaji("お茶漬け") == "Ochazuke"
+    assert cut.romaji("お茶漬け") == "Ochazuke"
+    info = cut.cache_info()
+    assert info.hits > 0 and info.misses > 0
+    assert info.currsize <= 4
+
+    # settings changes must not return stale results
+    cut.update_mapping("づ", "du")
+    assert cut.romaji("お茶漬け") == "Ochaduke"
+    cut.add_exception("茶漬け", "chazuke")
+    assert cut.romaji("お茶漬け") == "Ochazuke"
+
+    uncached = Cutlet(word_cache_size=0)
+    assert uncached.romaji("お茶漬け") == "Ochazuke"
+    assert uncached.cache_info().currsize == 0
+
+
+@pytest.mark.parametrize("kana", ["がっこう", "しんしありーゆあーず", "くゞる", "ずっーと"])
+def test_map_kana_compiled(kana):
+    cut = Cutlet()
+    for _ in range(2):
+        gold = ""
+        for ki, kk in enumerate(kana):
+            pk = kana[ki - 1] if ki > 0 else None
+            nk = kana[ki + 1] if ki < len(kana) - 1 else None
+            gold += cut.get_single_mapping(pk, kk, nk)
+        assert cut.map_kana(kana) == gold
+        cut.update_mapping("こ", "co")
+
+
+FAST_PATH = [
+    ("ケメコデラックス", "Kemekoderakkusu", False),
+    ("ﾌﾟﾌﾟﾌﾟﾗﾝﾄﾞ", "Pupupurando", False),
+    ("あっ", "A", False),
+    ("ずっーと", "Zu--to", False),
+    # no output, so the tagger is used
+    ("ぁ", "A", False),
+    ("ゃ", "", False),
+    # read as written, unlike the tagged path
+    ("かつかれー", "Katsukaree", False),
+    ("NINJAL  2 go", "NINJAL 2 go", False),
+    # title case needs the tagger, so ASCII isn't passed through
+    ("hello world", "Hello World", True),
+    ("NINJAL", "Ninjal", True),
+    # not eligible, uses the tagger
+    ("カツカレーは美味しい", "Cutlet curry wa oishii", False),
+    ("McDonald's", "McDonald's", False),
+]
+
+
+@pytest.mark.parametrize("ja, roma, title", FAST_PATH)
+def test_fast_path(ja, roma, title):
+    cut = Cutlet(fast_path=True)
+    assert cut.romaji(ja, title=title) == roma
+    assert list(cut.romaji_many([ja], title=title)) == [roma]
+    # the same as the tagged path for ASCII
+    if ja.isascii():
+        assert Cutlet().romaji(ja, title=title) == roma
+
+
+def test_fast_path_ascii_exception():
+    cut = Cutlet(fast_path=True)
+    cut.add_exception("NINJAL", "Ninjal")
+    assert cut.romaji("NINJAL") == "Ninjal"
+
+
+def test_result_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    texts = [ja for ja, _ in SENTENCES]
+    golds = [roma for _, roma in SENTENCES]
+
+    cut = Cutlet(cache_path=path)
+    assert list(cut.romaji_many(texts)) == golds
+    assert cut.result_cache.misses > 0
+    assert [cut.romaji(text) for text in texts] == golds
+    assert cut.slug("東京タワーの高さは？") == "tokyo-tower-no-takasa-wa"
+    cut.result_cache.close()
+
+    # results persist across instances
+    cut = Cutlet(cache_path=path)
+    assert list(cut.romaji_many(texts)) == golds
+    assert cut.result_cache.misses == 0
+
+    # settings changes get new keys
+    cut.update_mapping("づ", "du")
+    assert cut.romaji("お茶漬け") == "Ochaduke"
+    kunrei = Cutlet("kunrei", cache_path=path)
+    assert kunrei.romaji("富士見坂") == "Huzimi saka"
+
+
+def test_result_cache_eviction(tmp_path):
+    cut = Cutlet(cache_path=str(tmp_path / "cache.db"), cache_size=10)
+    texts = [ja for ja, _ in SENTENCES]
+    golds = [roma for _, roma in SENTENCES]
+    for text, gold in zip(texts, golds):
+        assert cut.romaji(text) == gold
+    assert len(cut.result_cache) <= 10
+    assert list(cut.romaji_many(texts)) == golds
+
+
+def test_result_cache_recency(tmp_path):
+    import sqlite3
+    from cutlet.cache import ResultCache
+
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(path, max_size=20)
+    cache.put_many([(b"old", "a"), (b"new", "b")])
+    # lookups don't write
+    changes = cache._conn.total_changes
+    assert cache.get(b"old") == "a"
+    assert cache.get_many([b"old", b"missing"]) == {b"old": "a"}
+    assert cache._conn.total_changes == changes
+
+    # but recency is written before evicting
+    for ii in range(18):
+        cache.put(str(ii).encode(), str(ii))
+        cache.get_many([])
+    assert cache.get(b"old") == "a"
+    cache.put(b"last", "c")
+    assert cache.get(b"old") == "a"
+    assert cache.get(b"new") is None
+
+    # and on close
+    assert cache.get(b"17") == "17"
+    cache.close()
+    conn = sqlite3.connect(path)
+    used = dict(conn.execute("SELECT key, used FROM results"))
+    assert used[b"17"] == max(used.values())
+    conn.close()
+
+
+def test_stats(tmp_path):
+    seen = []
+    cut = Cutlet(fast_path=True, cache_path=str(tmp_path / "cache.db"))
+    stats = cut.enable_stats(lambda stage, secs: seen.append(stage))
+    texts = ["カツカレーは美味しい", "彁は幽霊文字", "ケメコデラックス", "カツカレーは美味しい"]
+    golds = ["Cutlet curry wa oishii", "? wa yuurei moji", "Kemekoderakkusu"]
+    assert list(cut.romaji_many(texts)) == golds + golds[:1]
+
+    assert stats.calls == 4
+    assert stats.unk_nodes == 1
+    assert stats.fast_path_hits == 1
+    assert stats.result_cache_hits == 1
+    assert stats.counts["tag"] == 2
+    assert sum(stats.histograms["normalize"]) == 4
+    assert seen.count("join") == 2
+    assert stats.as_dict()["stages"]["tag"]["count"] == 2
+
+    cut.disable_stats()
+    assert cut.romaji("カツカレーは美味しい") == "Cutlet curry wa oishii"
+    assert stats.calls == 4
+
+
+@pytest.mark.parametrize("text, roma", SENTENCES)
+def test_alignment(text, roma):
+    cut = Cutlet()
+    norm = normalize_text(text)
+    nodes = [node.surface for node in cut.tagger(norm)]
+    toks = [tok.surface for tok in cut.romaji_tokens(cut.tagger(norm))]
+    align = cut.romaji_alignment(text)
+    assert len(align) == len(nodes)
+    for (start, end, rstart, rend), node, tok in zip(align, nodes, toks):
+        assert norm[start:end] == node
+        assert 0 <= rstart <= rend <= len(roma)
+        if tok.strip():
+            assert roma[rstart:rend] == tok
+
+
+def test_phrase_exceptions():
+    import pickle
+
+    cut = Cutlet()
+    # unrelated phrases don't change anything
+    for ii in range(1000):
+        cut.add_phrase_exception(f"東京第{ii}倉庫", f"warehouse {ii}")
+    for ja, roma in SENTENCES:
+        assert cut.romaji(ja) == roma
+
+    cut.add_phrase_exception("東京タワー", "Tokyo Tower")
+    cut.add_phrase_exception("東京", "TOKIO")
+    cut.add_phrase_exception("New York", "NYC")
+    assert cut.romaji("東京タワーの高さは？") == "Tokyo Tower no takasa wa?"
+    assert cut.romaji("東京タワー、東京に行く") == "Tokyo Tower, TOKIO ni iku"
+    assert cut.romaji("I love New York.") == "I love NYC."
+    assert cut.romaji("New and York") == "New and York"
+    assert cut.slug("東京タワーの高さは？") == "tokyo-tower-no-takasa-wa"
+
+    # one token per node, and the phrase spans its nodes
+    text = "東京タワーの高さ"
+    toks = cut.romaji_tokens(cut.tagger(text))
+    assert [tok.surface for tok in toks[:2]] == ["Tokyo Tower", ""]
+    assert cut.romaji_alignment(text)[0] == (0, 2, 0, 11)
+    assert "".join(cut.romaji_stream("東京タワー。東京タワー")) == (
+        "Tokyo Tower. Tokyo Tower"
+    )
+
+    copy = pickle.loads(pickle.dumps(cut))
+    assert copy.romaji("東京タワーの高さは？") == "Tokyo Tower no takasa wa?"
+    fast = Cutlet(fast_path=True)
+    fast.add_phrase_exception("New York", "NYC")
+    assert fast.romaji("New York") == "NYC"
+
+    # siblings from with_options pick up phrases added later
+    cut = Cutlet()
+    variants = {"h": {}, "k": {"system": "kunrei"}}
+    assert cut.romaji_variants("東京タワー", variants)["k"] == "Tokyo tower"
+    cut.add_phrase_exception("東京タワー", "Tokyo Tower")
+    assert cut.romaji_variants("東京タワー", variants) == {
+        "h": "Tokyo Tower",
+        "k": "Tokyo Tower",
+    }
+
+
+def test_exception_files(tmp_path):
+    import pickle
+    from cutlet.index import StringIndex, build_index
+
+    path = str(tmp_path / "words.idx")
+    pairs = [(f"語{ii}", f"go{ii}") for ii in range(1000)]
+    pairs += [("東京", "TOKIO"), ("新橋", "NEWBRIDGE")]
+    assert build_index(pairs, path) == 1002
+    index = StringIndex(path)
+    assert len(index) == 1002
+    assert index.get("語999") == "go999"
+    assert "語1000" not in index
+    assert not index.has_ascii_keys
+    assert pickle.loads(pickle.dumps(index)).get("東京") == "TOKIO"
+
+    tsv = tmp_path / "words.tsv"
+    tsv.write_text("# comment\n\n新橋\tShinbashi-TSV\n", encoding="utf-8")
+    cut = Cutlet(exception_files=[path, str(tsv)])
+    # TSV files win over compiled files
+    assert cut.romaji("東京と新橋") == "Tokio to Shinbashi-TSV"
+    copy = pickle.loads(pickle.dumps(cut))
+    assert copy.romaji("東京と新橋") == "Tokio to Shinbashi-TSV"
+    assert cut.fingerprint() != Cutlet().fingerprint()
+
+    tsv.write_text("新橋 bad line\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Cutlet(exception_files=[str(tsv)]).romaji("新橋")
+
+
+def write_dic(path, features):
+    """Write a MeCab dictionary file with only token records and features."""
+    from cutlet.lexicon import DIC_HEADER, DIC_MAGIC, DIC_TOKEN
+
+    tokens = bytearray()
+    data = bytearray()
+    for feature in features:
+        tokens += DIC_TOKEN.pack(0, 0, 0, 0, len(data), 0)
+        data += feature.encode("utf-8") + b"\0"
+    size = DIC_HEADER.size + len(tokens) + len(data)
+    header = DIC_HEADER.pack(
+        DIC_MAGIC ^ size, 102, 0, len(features), 0, 0, 0, len(tokens), len(data), 0, b"utf-8"
+    )
+    with open(path, "wb") as out:
+        out.write(header + tokens + data)
+
+
+class SmallDictionary:
+    """A tagger that reports a different dictionary file."""
+
+    def __init__(self, tagger, path):
+        self.tagger = tagger
+        self.dictionary_info = [{"filename": path, "size": 1, "version": 102}]
+
+    def __call__(self, text):
+        return self.tagger(text)
+
+
+def test_build_lexicon(tmp_path):
+    from itertools import islice
+
+    import jaconv
+    from cutlet.lexicon import build_lexicon, read_features
+
+    cut = Cutlet()
+    dic = cut.tagger.dictionary_info[0]["filename"]
+    features = list(islice(read_features(dic), 2000))
+    # quoted fields, and a reading with no mapping
+    kana_field = cut.tagger("あ")[0].feature._fields.index("kana")
+    row = ["*"] * 26
+    row[8] = '","'
+    row[kana_field] = "カンマ"
+    features.append(",".join(row))
+    row[8] = "ヿ"
+    row[kana_field] = "ヿ"
+    features.append(",".join(row))
+    path = str(tmp_path / "sys.dic")
+    write_dic(path, features)
+    assert list(read_features(path)) == features
+
+    cut.tagger = SmallDictionary(cut.tagger, path)
+    lexicon = str(tmp_path / "test.lex")
+    count = build_lexicon(cut, lexicon)
+
+    lex = Cutlet(lexicon_path=lexicon, word_cache_size=0)
+    lex.tagger = SmallDictionary(lex.tagger, path)
+    index = lex.lexicon
+    assert index is not None and len(index) == count + 1
+    readings = {ff.split(",")[kana_field] for ff in features[:2000]} - {"*", ""}
+    readings.add("カンマ")
+    assert count == len(readings)
+    assert index.get("ヿ") is None
+    for kana in readings:
+        assert index.get(kana) == cut.map_kana(jaconv.kata2hira(kana))
+    for ja, roma in SENTENCES:
+        assert lex.romaji(ja) == roma
+
+
+def test_lexicon(tmp_path):
+    from itertools import islice
+    from cutlet.index import build_index
+    from cutlet.lexicon import FINGERPRINT_KEY, read_features
+
+    cut = Cutlet()
+    dic = cut.tagger.dictionary_info[0]["filename"]
+    features = list(islice(read_features(dic), 100))
+    assert len(features) == 100 and all("," in ff for ff in features)
+
+    # a full lexicon takes a while to build, so use a small one
+    path = str(tmp_path / "test.lex")
+    pairs = [("タベル", "TABERU"), (FINGERPRINT_KEY, cut.lexicon_fingerprint())]
+    build_index(pairs, path)
+    lex = Cutlet(lexicon_path=path)
+    assert lex.lexicon is not None
+    assert lex.romaji("ご飯を食べる") == "Gohan wo TABERU"
+    assert lex.romaji("ご飯を食べた") == cut.romaji("ご飯を食べた")
+
+    # not used for other mapping tables
+    assert Cutlet("kunrei", lexicon_path=path).lexicon is None
+    lex.update_mapping("づ", "du")
+    assert lex.lexicon is None
+    assert lex.romaji("ご飯を食べる") == "Gohan wo taberu"
+
+
+STREAM_DOCS = [
+    "本を読みました。新橋行きの電車に乗った。カツカレーは美味しい",
+    "  やっちゃった！暖かかった\n\n東京タワーの高さは333mです。 \n",
+    'It\'s \'delicious.\'\n"Hello," he said.',
+    "",
+]
+
+
+@pytest.mark.parametrize("doc", STREAM_DOCS)
+def test_romaji_stream(doc):
+    cut = Cutlet()
+    assert "".join(cut.romaji_stream(doc)) == cut.romaji(doc)
+    lines = doc.splitlines(keepends=True)
+    assert "".join(cut.romaji_stream(lines, title=True)) == cut.romaji(doc, title=True)
+    # blocks that end in the middle of a sentence, or a word
+    for size in (3, 7, 100):
+        blocks = [doc[ii : ii + size] for ii in range(0, len(doc), size)]
+        assert "".join(cut.romaji_stream(blocks)) == cut.romaji(doc)
+
+
+def test_thread_safe(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cut = Cutlet(thread_safe=True, cache_path=str(tmp_path / "cache.db"))
+    texts = [ja for ja, _ in SENTENCES] * 5
+    golds = [roma for _, roma in SENTENCES] * 5
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(cut.romaji, texts)) == golds
+        assert [list(rr) for rr in pool.map(cut.romaji_many, [texts] * 4)] == [golds] * 4
+
+    table = cut.table
+    cut.update_mapping("づ", "du")
+    assert cut.table is not table
+    assert cut.romaji("お茶漬け") == "Ochaduke"
+    cut.add_exception("茶漬け", "chazuke")
+    assert cut.romaji("お茶漬け") == "Ochazuke"
+
+    # calls in progress keep the settings they started with
+    cut = Cutlet(thread_safe=True)
+    ref = Cutlet()
+    ref.update_mapping("づ", "du")
+    doc = ["お茶漬け。", "お茶漬け。"]
+    cut.update_mapping("づ", "du")
+    stream = cut.romaji_stream(doc)
+    first = next(stream)
+    cut.update_mapping("づ", "dzu")
+    assert first + "".join(stream) == ref.romaji("".join(doc))
+    assert cut.romaji("お茶漬け") == "Ochadzuke"
+    assert cut.map_kana("づ") == "dzu"
+    assert cut.cache_info().currsize > 0
+    assert cut.romaji("カツカレー") == "Cutlet curry"
+    cut.use_foreign_spelling = False
+    assert cut.romaji("カツカレー") == "Katsu karee"
+    assert cut.romaji("彁") == "?"
+    cut.ensure_ascii = False
+    assert cut.romaji("彁") == "彁"
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_async(processes):
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    cut = Cutlet()
+    cut.add_exception("本", "book")
+    texts = [ja for ja, _ in SENTENCES] + ["本を読む"]
+    golds = [cut.romaji(text) for text in texts]
+    titles = [cut.romaji(text, title=True) for text in texts]
+
+    async def run():
+        single = await asyncio.gather(*[cut.aromaji(text) for text in texts])
+        many = await cut.aromaji_many(texts, title=True)
+        return single, many
+
+    if processes:
+        with ProcessPoolExecutor(2) as executor:
+            cut.configure_async(executor, max_batch_size=4)
+            single, many = asyncio.run(run())
+    else:
+        cut.configure_async(max_batch_size=4)
+        single, many = asyncio.run(run())
+    assert single == golds
+    assert many == titles
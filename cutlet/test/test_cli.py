@@ -0,0 +1,163 @@
+import gzip
+import json
+import sys
+
+import pytest
+from cutlet.cli import main
+
+LINES = ["カツカレーは美味しい", "東京タワーの高さは？"]
+
+
+def run(monkeypatch, capfd, *args):
+    monkeypatch.setattr(sys, "argv", ["cutlet", *args])
+    main()
+    return capfd.readouterr().out.splitlines()
+
+
+@pytest.fixture
+def infile(tmp_path):
+    path = tmp_path / "in.txt.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        out.write("\n".join(LINES) + "\n")
+    return str(path)
+
+
+def test_cli_default(monkeypatch, capfd, infile):
+    out = run(monkeypatch, capfd, "-i", infile)
+    assert out == ["Cutlet curry wa oishii", "Tokyo tower no takasa wa?"]
+
+
+def test_cli_options(monkeypatch, capfd, infile):
+    out = run(monkeypatch, capfd, "kunrei", "--title", "-i", infile)
+    assert out == ["Cutlet Curry wa Oisii", "Tokyo Tower no Takasa wa?"]
+    out = run(monkeypatch, capfd, "--no-capitalize", "-i", infile)
+    assert out == ["cutlet curry wa oishii", "Tokyo tower no takasa wa?"]
+
+
+def test_cli_jobs(monkeypatch, capfd, infile):
+    out = run(monkeypatch, capfd, "--slug", "-j", "2", "--batch-size", "1", "-i", infile)
+    assert out == ["cutlet-curry-wa-oishii", "tokyo-tower-no-takasa-wa"]
+
+
+def test_cli_jsonl(monkeypatch, capfd, tmp_path):
+    path = tmp_path / "in.jsonl"
+    records = [{"id": 1, "title": LINES[0]}, {"id": 2}]
+    path.write_text("\n".join(json.dumps(rr) for rr in records), encoding="utf-8")
+    args = ["--format", "jsonl", "--field", "title", "--out-field", "roma"]
+    out = run(monkeypatch, capfd, *args, "-j", "2", "-i", str(path))
+    assert [json.loads(line) for line in out] == [
+        {"id": 1, "title": LINES[0], "roma": "Cutlet curry wa oishii"},
+        {"id": 2, "roma": ""},
+    ]
+
+
+def test_cli_tsv(monkeypatch, capfd, tmp_path):
+    path = tmp_path / "in.tsv"
+    path.write_text("id\tname\tcat\n1\t東京タワー\t塔\n2\t寿司\n", encoding="utf-8")
+    args = ["--format", "tsv", "--column", "2", "--column", "3", "--header"]
+    out = run(monkeypatch, capfd, *args, "-i", str(path))
+    assert out == [
+        "id\tname\tcat\tname_romaji\tcat_romaji",
+        "1\t東京タワー\t塔\tTokyo tower\tTou",
+        "2\t寿司\t\tSushi\t",
+    ]
+
+
+def test_cli_csv(monkeypatch, capfd, tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text('id,name\n1,"東京,タワー"\n', encoding="utf-8")
+    out = run(monkeypatch, capfd, "--format", "csv", "--column", "2", "-i", str(path))
+    assert out == ["id,name,Name", '1,"東京,タワー","Tokyo, tower"']
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--column", "0"],
+        ["--column", "2", "--out-field", "a", "--out-field", "b"],
+        ["--column", "1", "--column", "2", "--out-field", "a"],
+    ],
+)
+def test_cli_bad_columns(monkeypatch, capfd, tmp_path, args):
+    path = tmp_path / "in.tsv"
+    path.write_text("a\tカツ\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        run(monkeypatch, capfd, "--format", "tsv", *args, "-i", str(path))
+    assert "--column" in capfd.readouterr().err
+
+
+def test_cli_compile_exceptions(monkeypatch, capfd, tmp_path, infile):
+    tsv = tmp_path / "brands.tsv"
+    tsv.write_text("# brands\nカレー\tKAREE\n", encoding="utf-8")
+    compiled = str(tmp_path / "brands.idx")
+    run(monkeypatch, capfd, "compile-exceptions", compiled, str(tsv))
+    for path in (str(tsv), compiled):
+        out = run(monkeypatch, capfd, "-e", path, "-j", "2", "-i", infile)
+        assert out == ["Cutlet KAREE wa oishii", "Tokyo tower no takasa wa?"]
+
+
+@pytest.fixture
+def server(tmp_path):
+    import threading
+    from cutlet import Cutlet
+    from cutlet.server import Engine, make_server
+
+    address = str(tmp_path / "cutlet.sock")
+    server = make_server(Engine(Cutlet(thread_safe=True)), address)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield address
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_server(server):
+    from cutlet.server import Client
+
+    with Client(server) as client:
+        assert client.request(LINES) == ["Cutlet curry wa oishii", "Tokyo tower no takasa wa?"]
+        assert client.request(LINES, mode="slug")[0] == "cutlet-curry-wa-oishii"
+        with pytest.raises(RuntimeError):
+            client.request(LINES, system="kunrei")
+
+
+def test_serve_socket_path(monkeypatch, tmp_path):
+    import socket
+    from cutlet import server as server_module
+
+    # other files are never replaced
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["cutlet", "serve", str(path)])
+    with pytest.raises(SystemExit, match="not a socket"):
+        main()
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+    # a stale socket is replaced, and the server removes its own on exit
+    address = tmp_path / "cutlet.sock"
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(address))
+    stale.close()
+    make_server = server_module.make_server
+    started = []
+
+    def fake_make_server(engine, address):
+        server = make_server(engine, address)
+        server.serve_forever = lambda: started.append(address)
+        return server
+
+    monkeypatch.setattr(server_module, "make_server", fake_make_server)
+    monkeypatch.setattr(sys, "argv", ["cutlet", "serve", str(address)])
+    main()
+    assert started == [str(address)]
+    assert not address.exists()
+
+
+def test_cli_connect(monkeypatch, capfd, infile, server):
+    out = run(monkeypatch, capfd, "--title", "--connect", server, "-i", infile)
+    assert out == ["Cutlet Curry wa Oishii", "Tokyo Tower no Takasa wa?"]
+    # server settings can't be changed by a client
+    with pytest.raises(SystemExit):
+        run(monkeypatch, capfd, "-j", "2", "-e", infile, "--connect", server, "-i", infile)
+    assert "--jobs, --exceptions can't be used" in capfd.readouterr().err
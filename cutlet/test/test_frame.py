@@ -0,0 +1,55 @@
+import pytest
+from cutlet import Cutlet
+from cutlet.frame import convert_unique
+
+TEXTS = ["カツカレーは美味しい", "東京タワー", "カツカレーは美味しい", None, "東京タワー"]
+ROMAJI = ["Cutlet curry wa oishii", "Tokyo tower", "Cutlet curry wa oishii", None, "Tokyo tower"]
+
+
+def test_convert_unique():
+    cut = Cutlet()
+    texts = ["カツカレーは美味しい", "東京タワー"]
+    assert convert_unique(cut, texts) == ["Cutlet curry wa oishii", "Tokyo tower"]
+    assert convert_unique(cut, texts, slug=True, workers=2) == [
+        "cutlet-curry-wa-oishii",
+        "tokyo-tower",
+    ]
+
+
+def test_romaji_series():
+    pd = pytest.importorskip("pandas")
+    from cutlet.frame import romaji_series
+
+    cut = Cutlet()
+    series = pd.Series(TEXTS, index=list("abcde"), name="name")
+    out = romaji_series(cut, series)
+    assert list(out.index) == list("abcde")
+    assert out.name == "name"
+    assert out.tolist() == ROMAJI
+
+    out = romaji_series(cut, series.astype("string"), title=True)
+    assert out.dtype == "string"
+    assert out.isna().tolist() == [False, False, False, True, False]
+    assert out.iloc[1] == "Tokyo Tower"
+    assert romaji_series(cut, series[:0]).tolist() == []
+
+
+def test_romaji_arrow():
+    pa = pytest.importorskip("pyarrow")
+    from cutlet.frame import romaji_arrow
+
+    cut = Cutlet()
+    array = pa.array(TEXTS)
+    assert romaji_arrow(cut, array).to_pylist() == ROMAJI
+
+    chunked = pa.chunked_array([TEXTS[:2], TEXTS[2:]], type=pa.large_string())
+    out = romaji_arrow(cut, chunked, slug=True)
+    assert out.type == pa.large_string()
+    assert out.to_pylist() == [
+        "cutlet-curry-wa-oishii",
+        "tokyo-tower",
+        "cutlet-curry-wa-oishii",
+        None,
+        "tokyo-tower",
+    ]
+    assert romaji_arrow(cut, array.dictionary_encode()).to_pylist() == ROMAJI
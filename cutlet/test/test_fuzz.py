@@ -2,7 +2,7 @@ import pytest
 from cutlet import Cutlet, normalize_text
 from fugashi import Tagger
 from hypothesis import given
-from hypothesis.strategies import from_regex
+from hypothesis.strategies import from_regex, text
 
 # see here:
 # https://stackoverflow.com/questions/19899554/unicode-range-for-japanese
@@ -28,3 +28,29 @@ def test_node_count_match(ss):
     nodes = tagger(text)
     tokens = cutlet.romaji_tokens(nodes)
     assert len(nodes) == len(tokens), "Number of output tokens doesn't match input"
+
+
+def normalize_reference(text):
+    # the original implementation of normalize_text
+    import unicodedata
+
+    mojimoji = pytest.importorskip("mojimoji")
+
+    text = unicodedata.normalize("NFKC", text)
+    text = mojimoji.zen_to_han(text, kana=False)
+    text = mojimoji.han_to_zen(text, digit=False, ascii=False)
+    return text
+
+
+# full- and half-width forms, quotes, and (semi-)voiced sound marks
+WIDTH = "\u3000-\u303F\uFF00-\uFFEF\u2018-\u201F\u3099-\u309C"
+
+
+@given(text())
+def test_normalize_matches_reference(ss):
+    assert normalize_text(ss) == normalize_reference(ss)
+
+
+@given(from_regex(f"[{WIDTH}{HIRAGANA}{KATAKANA} a-zA-Z0-9]*", fullmatch=True))
+def test_normalize_width_matches_reference(ss):
+    assert normalize_text(ss) == normalize_reference(ss)
@@ -16,9 +16,12 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/polm/cutlet",
     packages=setuptools.find_packages(),
-    install_requires=["jaconv", "fugashi", "mojimoji"],
+    install_requires=["jaconv", "fugashi"],
+    # for cutlet.frame
+    extras_require={"pandas": ["pandas"], "arrow": ["pyarrow"]},
     setup_requires=["setuptools-scm"],
-    tests_require=["pytest", "hypothesis"],
+    # mojimoji is used to check normalize_text against its old implementation
+    tests_require=["pytest", "hypothesis", "mojimoji"],
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Natural Language :: Japanese",